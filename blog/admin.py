@@ -36,6 +36,8 @@ class PostAdmin(admin.ModelAdmin):
     search_fields = ('title', 'content')
     ordering = ('-created_at',)
     filter_horizontal = ('tags',)
+    # Maintained with F() updates; an admin save must not write back stale values
+    readonly_fields = Post.COUNTER_FIELDS
 
 
 # -------------------------
@@ -0,0 +1,250 @@
+from collections import Counter
+
+from django.conf import settings
+from django.db import IntegrityError
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from blog import bulk
+from blog.models import Category, Post, Tag
+
+
+def max_items():
+    return getattr(settings, "BLOG_API_BULK_MAX_ITEMS", 1000)
+
+
+# -------------------------
+# Item serializers
+# -------------------------
+# Plain fields only: related ids and uniqueness are checked once per batch
+# instead of once per item by PrimaryKeyRelatedField / UniqueValidator.
+class PostBulkItemSerializer(serializers.Serializer):
+    id = serializers.IntegerField(required=False)
+    title = serializers.CharField(max_length=Post._meta.get_field("title").max_length)
+    content = serializers.CharField()
+    category_id = serializers.IntegerField(required=False, allow_null=True)
+    tag_ids = serializers.ListField(child=serializers.IntegerField(), required=False)
+
+
+class TagBulkItemSerializer(serializers.Serializer):
+    id = serializers.IntegerField(required=False)
+    name = serializers.CharField(max_length=Tag._meta.get_field("name").max_length)
+    slug = serializers.SlugField(max_length=Tag._meta.get_field("slug").max_length)
+
+
+class CategoryBulkItemSerializer(serializers.Serializer):
+    id = serializers.IntegerField(required=False)
+    name = serializers.CharField(max_length=Category._meta.get_field("name").max_length)
+    slug = serializers.SlugField(max_length=Category._meta.get_field("slug").max_length)
+
+
+# -------------------------
+# Batch validation
+# -------------------------
+class BulkBatch:
+    """
+    Validates a list payload item by item and collects one result per
+    input index; only items without errors are written.
+    """
+
+    def __init__(self, payload, serializer_class, partial=False):
+        if not isinstance(payload, list):
+            raise ValidationError({"non_field_errors": ["Expected a list of items."]})
+        if len(payload) > max_items():
+            raise ValidationError({"non_field_errors": [f"At most {max_items()} items per request."]})
+        self.results = [None] * len(payload)
+        self.valid = {}
+        for index, item in enumerate(payload):
+            serializer = serializer_class(data=item, partial=partial)
+            if serializer.is_valid():
+                self.valid[index] = serializer.validated_data
+            else:
+                self.fail(index, status.HTTP_400_BAD_REQUEST, serializer.errors)
+
+    def fail(self, index, code, errors):
+        self.valid.pop(index, None)
+        self.results[index] = {"index": index, "status": code, "errors": errors}
+
+    def succeed(self, index, code, pk):
+        self.results[index] = {"index": index, "status": code, "id": pk}
+
+    def require_ids(self):
+        for index, data in list(self.valid.items()):
+            if "id" not in data:
+                self.fail(index, status.HTTP_400_BAD_REQUEST, {"id": ["This field is required."]})
+
+    def check_references(self, field, model, many=False):
+        """One query for every id referenced through ``field`` across the batch."""
+        def referenced(data):
+            value = data.get(field)
+            if value is None:
+                return []
+            return value if many else [value]
+
+        wanted = {pk for data in self.valid.values() for pk in referenced(data)}
+        existing = set(model.objects.filter(id__in=wanted).values_list("id", flat=True))
+        for index, data in list(self.valid.items()):
+            missing = [pk for pk in referenced(data) if pk not in existing]
+            if missing:
+                self.fail(index, status.HTTP_400_BAD_REQUEST,
+                          {field: [f'Invalid pk "{pk}" - object does not exist.' for pk in missing]})
+
+    def check_unique(self, model, fields):
+        """Rejects values already taken in the table (by another row) or repeated within the batch."""
+        for field in fields:
+            values = Counter(data[field] for data in self.valid.values() if field in data)
+            taken = dict(model.objects.filter(**{f"{field}__in": list(values)}).values_list(field, "id"))
+            for index, data in list(self.valid.items()):
+                value = data.get(field)
+                if value is None:
+                    continue
+                owner = taken.get(value)
+                if values[value] > 1 or (owner is not None and owner != data.get("id")):
+                    self.fail(index, status.HTTP_400_BAD_REQUEST,
+                              {field: [f"{model._meta.verbose_name} with this {field} already exists."]})
+
+    def response(self):
+        return Response({"results": self.results})
+
+
+def _instances(batch, queryset):
+    """Loads every id in the batch with one query; unknown ids become 404 results."""
+    found = queryset.in_bulk([data["id"] for data in batch.valid.values()])
+    for index, data in list(batch.valid.items()):
+        if data["id"] not in found:
+            batch.fail(index, status.HTTP_404_NOT_FOUND, {"detail": "Not found."})
+    return found
+
+
+def _delete_ids(request):
+    ids = request.data.get("ids") if isinstance(request.data, dict) else None
+    if not isinstance(ids, list) or not all(isinstance(pk, int) and not isinstance(pk, bool) for pk in ids):
+        raise ValidationError({"ids": ["Expected a list of integer ids."]})
+    if len(ids) > max_items():
+        raise ValidationError({"ids": [f"At most {max_items()} ids per request."]})
+    return ids
+
+
+def _write(batch, write):
+    try:
+        write()
+    except IntegrityError as exc:
+        # Raced with another writer; nothing in the batch was committed
+        for index in list(batch.valid):
+            batch.fail(index, status.HTTP_409_CONFLICT, {"detail": str(exc)})
+
+
+# -------------------------
+# Viewset mixins
+# -------------------------
+class PostBulkMixin:
+    """
+    POST /api/posts/bulk/ creates, PATCH updates ({"id": ..., fields}) and
+    DELETE removes ({"ids": [...]}) up to BLOG_API_BULK_MAX_ITEMS posts in
+    one transaction, answering with a result per item.
+    """
+
+    @action(detail=False, methods=["post", "patch", "delete"], url_path="bulk",
+            permission_classes=[IsAuthenticated])
+    def bulk(self, request):
+        if request.method == "DELETE":
+            return self.bulk_delete(request)
+        partial = request.method == "PATCH"
+        batch = BulkBatch(request.data, PostBulkItemSerializer, partial=partial)
+        if partial:
+            batch.require_ids()
+        batch.check_references("category_id", Category)
+        batch.check_references("tag_ids", Tag, many=True)
+
+        if not partial:
+            indexes = list(batch.valid)
+
+            def write():
+                posts = bulk.create_posts(request.user, [batch.valid[index] for index in indexes])
+                for index, post in zip(indexes, posts):
+                    batch.succeed(index, status.HTTP_201_CREATED, post.pk)
+        else:
+            posts = _instances(batch, Post.objects.all())
+            for index, data in list(batch.valid.items()):
+                if not self._may_write(request.user, posts[data["id"]]):
+                    batch.fail(index, status.HTTP_403_FORBIDDEN,
+                               {"detail": "You do not have permission to perform this action."})
+            changes = [(index, posts[data["id"]], data) for index, data in batch.valid.items()]
+
+            def write():
+                bulk.update_posts([(post, data) for _index, post, data in changes])
+                for index, post, _data in changes:
+                    batch.succeed(index, status.HTTP_200_OK, post.pk)
+
+        if batch.valid:
+            _write(batch, write)
+        return batch.response()
+
+    def bulk_delete(self, request):
+        ids = _delete_ids(request)
+        authors = dict(Post.objects.filter(id__in=ids).values_list("id", "author_id"))
+        results, allowed = [], []
+        for index, pk in enumerate(ids):
+            if pk not in authors:
+                results.append({"index": index, "status": status.HTTP_404_NOT_FOUND, "errors": {"detail": "Not found."}})
+            elif authors[pk] != request.user.pk and not request.user.is_superuser:
+                results.append({"index": index, "status": status.HTTP_403_FORBIDDEN,
+                                "errors": {"detail": "You do not have permission to perform this action."}})
+            else:
+                allowed.append(pk)
+                results.append({"index": index, "status": status.HTTP_204_NO_CONTENT, "id": pk})
+        if allowed:
+            bulk.delete_posts(allowed)
+        return Response({"results": results})
+
+    @staticmethod
+    def _may_write(user, post):
+        return post.author_id == user.pk or user.is_superuser
+
+
+class TaxonomyBulkMixin:
+    """POST/PATCH/DELETE on /api/tags/bulk/ and /api/categories/bulk/, as for posts."""
+    bulk_item_serializer_class = None
+
+    @action(detail=False, methods=["post", "patch", "delete"], url_path="bulk",
+            permission_classes=[IsAuthenticated])
+    def bulk(self, request):
+        model = self.queryset.model
+        if request.method == "DELETE":
+            ids = _delete_ids(request)
+            existing = set(model.objects.filter(id__in=ids).values_list("id", flat=True))
+            bulk.delete_taxonomy(model, list(existing))
+            return Response({"results": [
+                {"index": index, "status": status.HTTP_204_NO_CONTENT, "id": pk} if pk in existing
+                else {"index": index, "status": status.HTTP_404_NOT_FOUND, "errors": {"detail": "Not found."}}
+                for index, pk in enumerate(ids)
+            ]})
+
+        partial = request.method == "PATCH"
+        batch = BulkBatch(request.data, self.bulk_item_serializer_class, partial=partial)
+        if partial:
+            batch.require_ids()
+            objects = _instances(batch, model.objects.all())
+        batch.check_unique(model, ("name", "slug"))
+
+        if not partial:
+            indexes = list(batch.valid)
+
+            def write():
+                created = bulk.create_taxonomy(model, [batch.valid[index] for index in indexes])
+                for index, obj in zip(indexes, created):
+                    batch.succeed(index, status.HTTP_201_CREATED, obj.pk)
+        else:
+            changes = [(index, objects[data["id"]], data) for index, data in batch.valid.items()]
+
+            def write():
+                bulk.update_taxonomy(model, [(obj, data) for _index, obj, data in changes])
+                for index, obj, _data in changes:
+                    batch.succeed(index, status.HTTP_200_OK, obj.pk)
+
+        if batch.valid:
+            _write(batch, write)
+        return batch.response()
@@ -0,0 +1,63 @@
+from datetime import datetime, time
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from blog.models import Post
+
+
+def _id_or_slug(relation, value):
+    if value.isdigit():
+        return Q(**{f"{relation}_id" if relation == "category" else f"{relation}__id": int(value)})
+    return Q(**{f"{relation}__slug": value})
+
+
+def _parse_moment(param, value):
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValidationError({param: "Expected an ISO 8601 date or datetime."})
+        moment = datetime.combine(day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+class PostFilterBackend(BaseFilterBackend):
+    """
+    Server-side filters for /api/posts/:
+
+        ?category=<id|slug>  ?tag=<id|slug>  ?author=<username>
+        ?status=draft|published|scheduled
+        ?created_after=<date|datetime>  ?created_before=<date|datetime>
+
+    Each filter combines with the keyset ordering into a single index range
+    scan (see the composite indexes on Post).
+    """
+    statuses = {value for value, _label in Post.STATUS_CHOICES}
+
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+        try:
+            if params.get("category"):
+                queryset = queryset.filter(_id_or_slug("category", params["category"]))
+            if params.get("tag"):
+                queryset = queryset.filter(_id_or_slug("tags", params["tag"]))
+            if params.get("author"):
+                queryset = queryset.filter(author__username=params["author"])
+            if params.get("status"):
+                if params["status"] not in self.statuses:
+                    raise ValidationError({"status": f"Choose one of {', '.join(sorted(self.statuses))}."})
+                queryset = queryset.filter(status=params["status"])
+            if params.get("created_after"):
+                queryset = queryset.filter(created_at__gte=_parse_moment("created_after", params["created_after"]))
+            if params.get("created_before"):
+                queryset = queryset.filter(created_at__lt=_parse_moment("created_before", params["created_before"]))
+        except ValueError as exc:
+            # Out-of-range dates and the like
+            raise ValidationError(str(exc))
+        return queryset
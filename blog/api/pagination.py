@@ -0,0 +1,70 @@
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from blog.pagination import InvalidCursor, KeysetPaginator, get_page_size
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    DRF adapter for blog.pagination.KeysetPaginator, so the API and the
+    HTML feeds share the same (created_at, id) cursors.
+
+    Views may list other keyset-safe fields in ``ordering_fields``, which
+    clients pick with ?ordering=<field> or ?ordering=-<field>; each needs
+    an index on (field, id).
+    """
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    ordering_query_param = "ordering"
+    field = "created_at"
+
+    def get_ordering(self, request, view=None):
+        """The validated (field, descending) ordering of the request."""
+        allowed = getattr(view, "ordering_fields", None) or (self.field,)
+        value = request.query_params.get(self.ordering_query_param) or f"-{self.field}"
+        field = value.removeprefix("-")
+        if field not in allowed:
+            choices = ", ".join(f"{name}, -{name}" for name in allowed)
+            raise ValidationError({self.ordering_query_param: f"Choose one of {choices}."})
+        return field, value.startswith("-")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        field, descending = self.get_ordering(request, view)
+        paginator = KeysetPaginator(
+            queryset,
+            page_size=get_page_size(request, self.page_size_query_param),
+            field=field,
+            descending=descending,
+        )
+        try:
+            self.page = paginator.page(request.query_params.get(self.cursor_query_param))
+        except InvalidCursor:
+            raise NotFound("Invalid cursor")
+        return self.page.object_list
+
+    def get_link(self, cursor):
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_link(self.page.next_cursor),
+            "previous": self.get_link(self.page.prev_cursor),
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
@@ -1,4 +1,8 @@
+from collections import defaultdict
+
+from django.conf import settings
 from rest_framework import serializers
+from blog import caching, ratings
 from blog.models import Post, Category, Tag
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -17,10 +21,14 @@ class PostSerializer(serializers.ModelSerializer):
     tags = TagSerializer(many=True, read_only=True)
     tag_ids = serializers.PrimaryKeyRelatedField(queryset=Tag.objects.all(), many=True, source="tags", write_only=True, required=False)
     author = serializers.ReadOnlyField(source="author.username")
+    rating = serializers.SerializerMethodField()
 
     class Meta:
         model = Post
-        fields = ["id", "title", "content", "author", "category", "category_id", "tags", "tag_ids", "created_at", "updated_at"]
+        fields = ["id", "title", "content", "author", "category", "category_id", "tags", "tag_ids", "rating", "created_at", "updated_at"]
+
+    def get_rating(self, obj):
+        return ratings.summary(obj)
 
     def create(self, validated_data):
         tags = validated_data.pop("tags", [])
@@ -35,3 +43,122 @@ class PostSerializer(serializers.ModelSerializer):
         if tags is not None:
             post.tags.set(tags)
         return post
+
+
+class RateSerializer(serializers.Serializer):
+    value = serializers.IntegerField(min_value=ratings.VALUES[0], max_value=ratings.VALUES[-1])
+
+
+# -------------------------
+# Read-only fast path
+# -------------------------
+# values() columns behind each readable PostSerializer field, in output order
+POST_FIELD_COLUMNS = {
+    "id": ("id",),
+    "title": ("title",),
+    "content": ("content",),
+    "author": ("author__username",),
+    "category": ("category_id", "category__name", "category__slug"),
+    "tags": (),
+    "rating": ratings.SUMMARY_FIELDS,
+    "created_at": ("created_at",),
+    "updated_at": ("updated_at",),
+}
+POST_FIELDS = tuple(POST_FIELD_COLUMNS)
+POST_ROW_FIELDS = tuple(column for columns in POST_FIELD_COLUMNS.values() for column in columns)
+API_POST = "api-post"
+
+_timestamp = serializers.DateTimeField()
+
+
+def _category(row):
+    if row["category_id"] is None:
+        return None
+    return {"id": row["category_id"], "name": row["category__name"], "slug": row["category__slug"]}
+
+
+_FIELD_BUILDERS = {
+    "id": lambda row, tags: row["id"],
+    "title": lambda row, tags: row["title"],
+    "content": lambda row, tags: row["content"],
+    "author": lambda row, tags: row["author__username"],
+    "category": lambda row, tags: _category(row),
+    "tags": lambda row, tags: tags,
+    "rating": lambda row, tags: ratings.summary(row),
+    "created_at": lambda row, tags: _timestamp.to_representation(row["created_at"]),
+    "updated_at": lambda row, tags: _timestamp.to_representation(row["updated_at"]),
+}
+
+
+def parse_fields(value):
+    """
+    The ``fields=`` sparse fieldset as a tuple in output order, or None for
+    every field.
+    """
+    if not value:
+        return None
+    requested = {name.strip() for name in value.split(",") if name.strip()}
+    unknown = requested - set(POST_FIELDS)
+    if unknown:
+        raise serializers.ValidationError(
+            {"fields": f"Unknown field(s) {', '.join(sorted(unknown))}; choose from {', '.join(POST_FIELDS)}."}
+        )
+    return tuple(field for field in POST_FIELDS if field in requested)
+
+
+def post_row_columns(fields=None, extra=()):
+    """values() columns needed to serialize ``fields``, plus any ``extra`` (e.g. the ordering key)."""
+    if fields is None:
+        columns = list(POST_ROW_FIELDS)
+    else:
+        columns = ["id", *(column for field in fields for column in POST_FIELD_COLUMNS[field])]
+    return list(dict.fromkeys([*columns, *extra]))
+
+
+def _tags_by_post(post_ids):
+    tags = defaultdict(list)
+    rows = (
+        Post.tags.through.objects.filter(post_id__in=post_ids)
+        .order_by(*(f"tag__{field}" for field in Tag._meta.ordering))
+        .values_list("post_id", "tag_id", "tag__name", "tag__slug")
+    )
+    for post_id, tag_id, name, slug in rows:
+        tags[post_id].append({"id": tag_id, "name": name, "slug": slug})
+    return tags
+
+
+def post_row_to_representation(row, tags, fields=POST_FIELDS):
+    """PostSerializer(post).data, restricted to ``fields``, built from a values() row."""
+    return {field: _FIELD_BUILDERS[field](row, tags) for field in fields}
+
+
+def serialize_post_rows(rows, fields=None):
+    """
+    Serializes values() rows without instantiating PostSerializer: one
+    query for all tags, plain dicts per row. With BLOG_API_POST_CACHE on,
+    each post's full representation is cached until its updated_at, author
+    name, post cache version or the taxonomy version changes, and the
+    tags query only covers the misses. Sparse fieldsets skip the cache and
+    only query tags when asked for.
+    """
+    if fields is not None:
+        tags = _tags_by_post([row["id"] for row in rows]) if "tags" in fields else defaultdict(list)
+        return [post_row_to_representation(row, tags[row["id"]], fields) for row in rows]
+
+    def build(missing):
+        tags = _tags_by_post([row["id"] for row in missing])
+        return {row["id"]: post_row_to_representation(row, tags[row["id"]]) for row in missing}
+
+    if not getattr(settings, "BLOG_API_POST_CACHE", True):
+        data = build(rows)
+        return [data[row["id"]] for row in rows]
+
+    by_id = {row["id"]: row for row in rows}
+    versions = caching.get_versions([caching.TAXONOMY, *map(caching.post_namespace, by_id)])
+    parts = {
+        pk: (pk, row["updated_at"], row["author__username"],
+             versions[caching.post_namespace(pk)], versions[caching.TAXONOMY])
+        for pk, row in by_id.items()
+    }
+    data = caching.get_or_set_many(API_POST, parts, lambda missing: build([by_id[pk] for pk in missing]))
+    return [data[row["id"]] for row in rows]
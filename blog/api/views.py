@@ -1,6 +1,13 @@
-from rest_framework import viewsets, permissions
+from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.generics import get_object_or_404
+from rest_framework.response import Response
+from blog import conditional, ratings
 from blog.models import Post, Category, Tag
-from .serializers import PostSerializer, CategorySerializer, TagSerializer
+from .bulk import CategoryBulkItemSerializer, PostBulkMixin, TagBulkItemSerializer, TaxonomyBulkMixin
+from .filters import PostFilterBackend
+from .pagination import KeysetCursorPagination
+from .serializers import PostSerializer, CategorySerializer, TagSerializer, RateSerializer, parse_fields, post_row_columns, serialize_post_rows
 
 class IsAuthorOrReadOnly(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
@@ -10,20 +17,70 @@ class IsAuthorOrReadOnly(permissions.BasePermission):
             return obj.author == request.user or request.user.is_superuser
         return request.user.is_authenticated
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(TaxonomyBulkMixin, viewsets.ModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    bulk_item_serializer_class = CategoryBulkItemSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
-class TagViewSet(viewsets.ModelViewSet):
+class TagViewSet(TaxonomyBulkMixin, viewsets.ModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
+    bulk_item_serializer_class = TagBulkItemSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
-class PostViewSet(viewsets.ModelViewSet):
+class PostViewSet(PostBulkMixin, viewsets.ModelViewSet):
     queryset = Post.objects.all().select_related("category", "author").prefetch_related("tags")
     serializer_class = PostSerializer
     permission_classes = [IsAuthorOrReadOnly]
+    pagination_class = KeysetCursorPagination
+    filter_backends = [PostFilterBackend]
+    # Keyset orderings, each backed by a (field, id) index; ?ordering=-like_count
+    ordering_fields = ("created_at", "updated_at", "like_count")
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
+
+    def get_row_queryset(self, extra=()):
+        """values() rows for the read-only fast path, narrowed to ?fields= if given."""
+        fields = parse_fields(self.request.query_params.get("fields"))
+        columns = post_row_columns(fields, extra)
+        return self.filter_queryset(Post.objects.all()).values(*columns), fields
+
+    def list(self, request, *args, **kwargs):
+        field, _descending = self.paginator.get_ordering(request, self)
+        etag = conditional.api_post_list_etag(request, field)
+        response = conditional.not_modified(request, etag)
+        if response is not None:
+            return response
+        rows, fields = self.get_row_queryset(extra=[field])
+        page = self.paginate_queryset(rows)
+        return conditional.set_validators(self.get_paginated_response(serialize_post_rows(page, fields)), etag)
+
+    def retrieve(self, request, *args, **kwargs):
+        pk = kwargs[self.lookup_field]
+        etag = None
+        if str(pk).isdigit():
+            etag = conditional.api_post_etag(int(pk), request.query_params.get("fields", ""))
+        response = conditional.not_modified(request, etag)
+        if response is not None:
+            return response
+        # IsAuthorOrReadOnly allows every safe method, so there is no
+        # object permission to check before serializing.
+        rows, fields = self.get_row_queryset()
+        row = get_object_or_404(rows, pk=pk)
+        return conditional.set_validators(Response(serialize_post_rows([row], fields)[0]), etag)
+
+    @action(detail=True, methods=["post"], permission_classes=[permissions.IsAuthenticated])
+    def rate(self, request, pk=None):
+        """Creates or replaces the caller's 1-5 star rating; returns the post's updated summary."""
+        serializer = RateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        post = get_object_or_404(Post.objects.live().only("id"), pk=pk)
+        value = serializer.validated_data["value"]
+        _rating, created = ratings.rate(request.user, post.pk, value)
+        row = Post.objects.filter(pk=post.pk).values(*ratings.SUMMARY_FIELDS).get()
+        return Response(
+            {"value": value, "rating": ratings.summary(row)},
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )
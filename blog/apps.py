@@ -6,4 +6,6 @@ class BlogConfig(AppConfig):
 
     def ready(self):
         import blog.signals
+        from blog import instrumentation
+        instrumentation.install()
         
\ No newline at end of file
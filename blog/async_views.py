@@ -0,0 +1,170 @@
+"""
+Async variants of the read-heavy views, routed instead of their blog.views
+counterparts when BLOG_ASYNC_VIEWS is on (serve myblog.asgi:application).
+
+Each view returns the same response as its sync twin. Independent queries
+run concurrently on worker threads of their own, so a request waits for
+the slowest of them rather than their sum; while it waits, the event loop
+serves other requests instead of holding a worker.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.decorators import login_required
+from django.core.handlers.asgi import ASGIRequest
+from django.db import close_old_connections
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.shortcuts import aget_object_or_404, render
+from django.template.loader import render_to_string
+
+from . import caching, conditional, realtime, search, viewcount
+from .models import Category, Notification, Post, Tag
+from .pagination import InvalidCursor, get_page_size, paginate_request
+from .views import detail_comments, detail_post, follow_context
+
+_render = sync_to_async(render)
+
+
+def _isolated(func):
+    """
+    Runs ``func`` on a worker thread outside the request's sync thread
+    (thread_sensitive=False), with its own database connection. Pool
+    threads outlive the request, so the connection is released the way
+    request_finished would release it.
+    """
+    def run():
+        try:
+            return func()
+        finally:
+            close_old_connections()
+
+    return sync_to_async(run, thread_sensitive=False)()
+
+
+async def gather(*funcs):
+    """Calls the blocking zero-argument ``funcs`` concurrently; returns their results in order."""
+    return await asyncio.gather(*(_isolated(func) for func in funcs))
+
+
+async def _load_user(request):
+    """
+    Resolves the lazy request.user once, so worker threads and templates
+    share it instead of each loading the session's user again.
+    """
+    request.user = await request.auser()
+
+
+# -------------------------
+# Home and filters
+# -------------------------
+async def render_feed(request, view_name, posts, filter=None, follow=None):
+    """Async render_feed: the cached fragment and the follow state are fetched concurrently."""
+    def build():
+        page = paginate_request(request, posts)
+        return render_to_string("blog/post_list.html", {"posts": page.object_list, "page": page}, request=request)
+
+    posts_html, follow_state = await gather(
+        lambda: caching.get_or_set(caching.FEED, (view_name, request.get_full_path()), build),
+        lambda: follow_context(request, *follow) if follow else None,
+    )
+    return await _render(request, "blog/home.html", {
+        "posts_html": posts_html,
+        "filter": filter,
+        "follow": follow_state,
+    })
+
+
+async def home(request):
+    await _load_user(request)
+    return await render_feed(request, "home", Post.objects.feed().live())
+
+
+async def posts_by_category(request, category_id):
+    await _load_user(request)
+    category = await aget_object_or_404(Category, id=category_id)
+    posts = Post.objects.feed().live().filter(category_id=category.id)
+    return await render_feed(request, "posts_by_category", posts, filter=f"Category: {category.name}",
+                             follow=("category", category.id))
+
+
+async def posts_by_tag(request, tag_id):
+    await _load_user(request)
+    tag = await aget_object_or_404(Tag, id=tag_id)
+    posts = Post.objects.feed().live().filter(tags=tag)
+    return await render_feed(request, "posts_by_tag", posts, filter=f"Tag: {tag.name}", follow=("tag", tag.id))
+
+
+async def search_posts(request):
+    await _load_user(request)
+    query = request.GET.get("q", "").strip()
+    if not query:
+        return await _render(request, "blog/home.html", {"posts": [], "filter": None})
+    try:
+        page = await sync_to_async(search.search_posts)(
+            query, cursor=request.GET.get("cursor"), page_size=get_page_size(request)
+        )
+    except InvalidCursor:
+        raise Http404("Invalid cursor")
+    return await _render(request, "blog/home.html", {"posts": page.object_list, "page": page, "filter": f"Search: {query}"})
+
+
+# -------------------------
+# Post detail
+# -------------------------
+async def post_detail(request, pk):
+    """Async post_detail: on a cache miss the post and its comments are loaded concurrently."""
+    if request.method != "GET":
+        return JsonResponse({"error": "Invalid request method"}, status=400)
+
+    async def build():
+        post, comments = await gather(lambda: detail_post(pk), lambda: detail_comments(pk))
+        return {"post": post, "comments": comments}
+
+    etag = await sync_to_async(conditional.post_detail_etag)(pk)
+    response = conditional.not_modified(request, etag)
+    if response is None:
+        payload = await caching.aget_or_set(caching.post_namespace(pk), ("detail",), build)
+        response = conditional.set_validators(JsonResponse(payload, safe=False), etag)
+    # Revalidations are still reads of the post
+    await sync_to_async(viewcount.record_view)(pk)
+    return response
+
+
+# -------------------------
+# Notifications
+# -------------------------
+@login_required
+async def my_notifications(request):
+    await _load_user(request)
+    inbox = Notification.objects.filter(user=request.user)
+    unread_only = request.GET.get("unread") == "1"
+    if unread_only:
+        inbox = inbox.filter(is_read=False)
+    page = await sync_to_async(paginate_request)(request, inbox)
+    return await _render(request, "blog/notifications.html", {
+        "notifications": page.object_list,
+        "page": page,
+        "unread_only": unread_only,
+    })
+
+
+async def notification_stream(request):
+    """
+    Server-Sent Events stream of the user's new notifications (see
+    blog/realtime.py). Reconnecting clients send Last-Event-ID and get
+    what they missed; a fresh connection starts from the newest
+    notification. Always async, whatever BLOG_ASYNC_VIEWS says: each open
+    stream would otherwise pin a worker thread. Under WSGI it would pin
+    the whole worker process anyway, so it answers 501 there instead.
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse("Notification streams need an ASGI server", status=501, content_type="text/plain")
+    user = await request.auser()
+    if not user.is_authenticated:
+        return HttpResponse("Authentication required", status=401, content_type="text/plain")
+    last_event_id = request.headers.get("Last-Event-ID") or request.GET.get("last_event_id", "")
+    last_id = int(last_event_id) if last_event_id.isdigit() else await realtime.latest_id(user.pk)
+    response = StreamingHttpResponse(realtime.stream(user.pk, last_id), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # let nginx pass events through unbuffered
+    return response
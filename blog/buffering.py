@@ -0,0 +1,99 @@
+import atexit
+import logging
+import operator
+import threading
+import time
+
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    """
+    Accumulates keyed values in process memory and hands them to a flush
+    callback in batches, so hot write paths don't hit the database per
+    request.
+
+    Values added under the same key are combined with ``merge`` (addition
+    by default). The buffer is flushed by a daemon timer ``interval``
+    seconds after the first pending write, immediately once ``max_pending``
+    keys are waiting, and at interpreter exit; a batch that fails to flush
+    is re-queued and retried one interval later. ``flush_func`` receives a
+    list of (key, value) pairs of at most ``batch_size`` items per call.
+    An interval of 0 disables buffering: every add is flushed inline.
+    """
+
+    def __init__(self, flush_func, interval=5.0, max_pending=1000, batch_size=500, merge=operator.add):
+        self.flush_func = flush_func
+        self.interval = interval
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.merge = merge
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._timer = None
+        self.last_flush = time.monotonic()
+        atexit.register(self.flush)
+
+    def add(self, key, value=1):
+        with self._lock:
+            if key in self._pending:
+                self._pending[key] = self.merge(self._pending[key], value)
+            else:
+                self._pending[key] = value
+            size = len(self._pending)
+            if size < self.max_pending:
+                self._schedule()
+        if not self.interval or size >= self.max_pending:
+            self.flush()
+
+    def pending(self):
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self):
+        """Writes out everything pending. Returns the number of keys flushed."""
+        with self._flush_lock:
+            with self._lock:
+                items = list(self._pending.items())
+                self._pending = {}
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+            for start in range(0, len(items), self.batch_size):
+                batch = items[start:start + self.batch_size]
+                try:
+                    self.flush_func(batch)
+                except Exception:
+                    logger.exception("Write-behind flush failed, re-queueing %d items", len(batch))
+                    self._requeue(batch)
+            self.last_flush = time.monotonic()
+            return len(items)
+
+    def _schedule(self):
+        """Starts the flush timer unless one is pending. Call with _lock held."""
+        if self.interval and self._timer is None:
+            self._timer = threading.Timer(self.interval, self._flush_from_timer)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _requeue(self, items):
+        with self._lock:
+            for key, value in items:
+                if key in self._pending:
+                    self._pending[key] = self.merge(value, self._pending[key])
+                else:
+                    self._pending[key] = value
+            # Retry after another interval even if nothing new is added
+            self._schedule()
+
+    def _flush_from_timer(self):
+        with self._lock:
+            self._timer = None
+        try:
+            self.flush()
+        finally:
+            # Connections are per-thread; don't leak the timer thread's.
+            connections.close_all()
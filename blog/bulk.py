@@ -0,0 +1,138 @@
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import caching, feeds, related, search
+from .models import Post
+
+BATCH_SIZE = 500
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Lets bulk_create keep given created_at/updated_at values instead of auto_now(_add)."""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+# -------------------------
+# Posts
+# -------------------------
+def set_tags(tag_ids_by_post, replace):
+    """One DELETE (when replacing) and one batched INSERT into the tags through table."""
+    through = Post.tags.through
+    if replace:
+        through.objects.filter(post_id__in=list(tag_ids_by_post)).delete()
+    rows = [
+        through(post_id=post_id, tag_id=tag_id)
+        for post_id, tag_ids in tag_ids_by_post.items()
+        for tag_id in dict.fromkeys(tag_ids)
+    ]
+    through.objects.bulk_create(rows, batch_size=BATCH_SIZE, ignore_conflicts=True)
+
+
+def _posts_changed(posts):
+    """
+    The work the Post save and tags m2m signals would have done, once for
+    the whole batch: search index, cache versions, related-post refresh
+    and fan-out to followers.
+    """
+    search.get_backend().index_posts(posts)
+    caching.bump(caching.FEED, *(caching.post_namespace(post.pk) for post in posts))
+    for post in posts:
+        related.mark_dirty(post.pk)
+        feeds.mark_dirty(post.pk)
+
+
+def create_posts(author, items):
+    """
+    Creates posts from validated dicts (title, content, category_id and
+    optionally tag_ids) in one transaction. Returns the posts, in order.
+    """
+    posts = [
+        Post(author=author, title=item["title"], content=item["content"], category_id=item.get("category_id"))
+        for item in items
+    ]
+    with transaction.atomic():
+        Post.objects.bulk_create(posts, batch_size=BATCH_SIZE)
+        set_tags(
+            {post.pk: item["tag_ids"] for post, item in zip(posts, items) if item.get("tag_ids")},
+            replace=False,
+        )
+        _posts_changed(posts)
+    return posts
+
+
+def update_posts(changes):
+    """
+    Applies [(post, validated partial dict), ...] with one bulk_update for
+    the union of changed columns and one tag replacement for posts whose
+    tag_ids were given.
+    """
+    now = timezone.now()
+    fields = {"updated_at"}
+    tag_ids_by_post = {}
+    for post, data in changes:
+        for field in ("title", "content", "category_id"):
+            if field in data:
+                setattr(post, field, data[field])
+                fields.add(field)
+        if "tag_ids" in data:
+            tag_ids_by_post[post.pk] = data["tag_ids"]
+        # bulk_update skips auto_now
+        post.updated_at = now
+    posts = [post for post, _data in changes]
+    with transaction.atomic():
+        Post.objects.bulk_update(posts, sorted(fields), batch_size=BATCH_SIZE)
+        if tag_ids_by_post:
+            set_tags(tag_ids_by_post, replace=True)
+        _posts_changed(posts)
+    return posts
+
+
+def delete_posts(post_ids):
+    """Deletes in one transaction; the post_delete receivers keep search, caches and counters in step."""
+    with transaction.atomic():
+        return Post.objects.filter(id__in=post_ids).delete()[0]
+
+
+# -------------------------
+# Tags and categories
+# -------------------------
+def create_taxonomy(model, items):
+    objects = [model(name=item["name"], slug=item["slug"]) for item in items]
+    with transaction.atomic():
+        model.objects.bulk_create(objects, batch_size=BATCH_SIZE)
+    caching.bump(caching.FEED, caching.TAXONOMY)
+    return objects
+
+
+def update_taxonomy(model, changes):
+    fields = set()
+    for obj, data in changes:
+        for field in ("name", "slug"):
+            if field in data:
+                setattr(obj, field, data[field])
+                fields.add(field)
+    objects = [obj for obj, _data in changes]
+    if fields:
+        with transaction.atomic():
+            model.objects.bulk_update(objects, sorted(fields), batch_size=BATCH_SIZE)
+        caching.bump(caching.FEED, caching.TAXONOMY)
+    return objects
+
+
+def delete_taxonomy(model, ids):
+    with transaction.atomic():
+        return model.objects.filter(id__in=ids).delete()[0]
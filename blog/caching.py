@@ -0,0 +1,170 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+FEED = "feed"
+TAXONOMY = "taxonomy"
+# Bumped whenever a denormalized Post counter changes (see blog.counters)
+COUNTERS = "counters"
+
+_MISSING = object()
+_stats = defaultdict(lambda: {"hits": 0, "misses": 0})
+_stats_lock = threading.Lock()
+
+
+def get_cache():
+    return caches[getattr(settings, "BLOG_CACHE_ALIAS", "default")]
+
+
+def post_namespace(post_id):
+    return f"post:{post_id}"
+
+
+# -------------------------
+# Version stamps
+# -------------------------
+def _version_key(namespace):
+    return f"blog:version:{namespace}"
+
+
+def _initial_version():
+    # Seeded from the clock so a cleared cache never reissues an old
+    # version (and with it an old ETag or cache key).
+    return int(time.time() * 1000)
+
+
+def get_version(namespace):
+    cache = get_cache()
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def get_versions(namespaces):
+    """Version stamps for many namespaces in one cache round trip."""
+    keys = {_version_key(namespace): namespace for namespace in namespaces}
+    versions = {keys[key]: version for key, version in get_cache().get_many(list(keys)).items()}
+    for namespace in keys.values():
+        if namespace not in versions:
+            versions[namespace] = get_version(namespace)
+    return versions
+
+
+def bump(*namespaces):
+    """
+    Invalidates every entry cached under the given namespaces by moving
+    their version stamp forward. Old entries are never read again and
+    simply age out of the backend.
+
+    Inside a transaction the bump waits for the commit. Bumping earlier
+    would let a concurrent reader store the pre-commit rows under the new
+    version, where they would be served until they expire.
+    """
+    transaction.on_commit(lambda: _bump_now(namespaces))
+
+
+def _bump_now(namespaces):
+    cache = get_cache()
+    for namespace in namespaces:
+        try:
+            cache.incr(_version_key(namespace))
+        except ValueError:
+            cache.set(_version_key(namespace), _initial_version(), timeout=None)
+
+
+# -------------------------
+# Lookups
+# -------------------------
+def _key(namespace, version, parts):
+    digest = hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+    return f"blog:{namespace}:{version}:{digest}"
+
+
+def make_key(namespace, parts):
+    return _key(namespace, get_version(namespace), parts)
+
+
+def _record(namespace, outcome, count=1):
+    group = namespace.split(":", 1)[0]
+    with _stats_lock:
+        _stats[group][outcome] += count
+
+
+def get_or_set(namespace, parts, compute, timeout=None):
+    """
+    Returns the cached value for ``parts`` (any repr-able tuple of view
+    arguments) under the current version of ``namespace``, computing and
+    storing it on a miss.
+    """
+    cache = get_cache()
+    key = make_key(namespace, parts)
+    value = cache.get(key, _MISSING)
+    if value is not _MISSING:
+        _record(namespace, "hits")
+        return value
+    _record(namespace, "misses")
+    logger.debug("Cache miss for %s %r", namespace, parts)
+    value = compute()
+    if timeout is None:
+        timeout = getattr(settings, "BLOG_CACHE_TIMEOUT", 300)
+    cache.set(key, value, timeout)
+    return value
+
+
+async def aget_or_set(namespace, parts, compute, timeout=None):
+    """get_or_set for async views; ``compute`` is a coroutine function, awaited on a miss."""
+    cache = get_cache()
+    key = _key(namespace, await sync_to_async(get_version)(namespace), parts)
+    value = await cache.aget(key, _MISSING)
+    if value is not _MISSING:
+        _record(namespace, "hits")
+        return value
+    _record(namespace, "misses")
+    logger.debug("Cache miss for %s %r", namespace, parts)
+    value = await compute()
+    if timeout is None:
+        timeout = getattr(settings, "BLOG_CACHE_TIMEOUT", 300)
+    await cache.aset(key, value, timeout)
+    return value
+
+
+def get_or_set_many(namespace, parts_by_item, compute, timeout=None):
+    """
+    Batched get_or_set: looks every item's parts up under the current
+    version of ``namespace`` in one round trip, and calls
+    ``compute(missing_items)`` once to produce {item: value} for the
+    misses. Returns {item: value} for all items.
+    """
+    cache = get_cache()
+    version = get_version(namespace)
+    keys = {item: _key(namespace, version, parts) for item, parts in parts_by_item.items()}
+    found = cache.get_many(list(keys.values()))
+    values = {item: found[key] for item, key in keys.items() if key in found}
+    missing = [item for item in keys if item not in values]
+    _record(namespace, "hits", len(values))
+    if missing:
+        _record(namespace, "misses", len(missing))
+        computed = compute(missing)
+        if timeout is None:
+            timeout = getattr(settings, "BLOG_CACHE_TIMEOUT", 300)
+        cache.set_many({keys[item]: value for item, value in computed.items()}, timeout)
+        values.update(computed)
+    return values
+
+
+def stats():
+    """Hit/miss counters per namespace group since process start."""
+    with _stats_lock:
+        return {group: dict(counts) for group, counts in _stats.items()}
@@ -0,0 +1,94 @@
+import hashlib
+
+from django.db.models import Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from . import caching, counters
+from .models import Post
+
+
+def make_etag(*parts):
+    return '"%s"' % hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+
+
+def post_state(pk):
+    """
+    (updated_at, comment_count, last_comment_at, live) for a post, or None
+    if it doesn't exist. Cached under the post's namespace, which every
+    post and comment write bumps, so validators cost no query when warm.
+    """
+    def compute():
+        row = (
+            Post.objects.filter(pk=pk)
+            .annotate(last_comment_at=Max("comments__created_at"))
+            .values_list("updated_at", "comment_count", "last_comment_at", "approved", "status")
+            .first()
+        )
+        if row is None:
+            return None
+        updated_at, comment_count, last_comment_at, approved, status = row
+        return updated_at, comment_count, last_comment_at, approved and status != "scheduled"
+
+    return caching.get_or_set(caching.post_namespace(pk), ("state",), compute)
+
+
+# -------------------------
+# Validators per endpoint
+# -------------------------
+def post_detail_etag(pk):
+    """
+    ETag for the post_detail JSON, or None if it would 404. The payload
+    also carries comments and the rating summary, which change without
+    touching updated_at, so there is no Last-Modified: the post namespace
+    version, bumped by every such write, is what makes the tag change.
+    """
+    state = post_state(pk)
+    if state is None or not state[3]:
+        return None
+    updated_at, comment_count, last_comment_at, _live = state
+    version = caching.get_version(caching.post_namespace(pk))
+    return make_etag("detail", pk, updated_at, comment_count, last_comment_at, version)
+
+
+def api_post_etag(pk, fields=""):
+    """ETag for the API representation; like post_detail, it carries no Last-Modified."""
+    state = post_state(pk)
+    if state is None:
+        return None
+    namespace = caching.post_namespace(pk)
+    versions = caching.get_versions([namespace, caching.TAXONOMY])
+    return make_etag("api", pk, fields, state[0], versions[namespace], versions[caching.TAXONOMY])
+
+
+def api_post_list_etag(request, ordering_field):
+    """
+    Post, comment, rating, tag and category writes bump the feed version,
+    which covers every listed field. Likes and other counter updates don't,
+    so lists ordered by a counter also carry the COUNTERS version. Pages
+    can shift under deletes, so lists carry no Last-Modified.
+    """
+    namespaces = [caching.FEED]
+    if ordering_field in counters.COUNTERS:
+        namespaces.append(caching.COUNTERS)
+    versions = caching.get_versions(namespaces)
+    return make_etag("api-list", request.get_full_path(), *(versions[namespace] for namespace in namespaces))
+
+
+# -------------------------
+# Responses
+# -------------------------
+def not_modified(request, etag=None, last_modified=None):
+    """A 304 (or 412) response if the request's preconditions say so, else None."""
+    if etag is None and last_modified is None:
+        return None
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    return get_conditional_response(request, etag=etag, last_modified=timestamp)
+
+
+def set_validators(response, etag=None, last_modified=None):
+    if etag:
+        response.headers["ETag"] = etag
+    if last_modified:
+        response.headers["Last-Modified"] = http_date(last_modified.timestamp())
+    return response
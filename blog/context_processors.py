@@ -0,0 +1,39 @@
+from django.utils.functional import SimpleLazyObject
+
+from .models import Profile
+
+THEME_SESSION_KEY = "theme"
+
+
+def theme(request):
+    """
+    Exposes the active theme as ``theme``. A signed-in user's preference is
+    read from their Profile once and then kept in the session, so pages
+    don't query the profile on every request.
+    """
+    user = getattr(request, "user", None)
+    if user is None or not user.is_authenticated:
+        return {"theme": request.COOKIES.get("theme") or "light"}
+    value = request.session.get(THEME_SESSION_KEY)
+    if value is None:
+        value = (
+            Profile.objects.filter(user=user).values_list("theme_preference", flat=True).first()
+            or "light"
+        )
+        request.session[THEME_SESSION_KEY] = value
+    return {"theme": value}
+
+
+def notifications(request):
+    """
+    Exposes ``unread_notifications`` from the profile's denormalized
+    counter, loaded only if a template actually renders it.
+    """
+    user = getattr(request, "user", None)
+
+    def unread():
+        if user is None or not user.is_authenticated:
+            return 0
+        return Profile.objects.filter(user=user).values_list("unread_notifications", flat=True).first() or 0
+
+    return {"unread_notifications": SimpleLazyObject(unread)}
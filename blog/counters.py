@@ -0,0 +1,102 @@
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum, Value
+from django.db.models.functions import Greatest
+
+from . import caching
+from .models import Post, Like, Comment, Bookmark, Rating
+
+# counter field -> (related model, aggregate over that model's rows per post)
+COUNTERS = {
+    "like_count": (Like, Count("id")),
+    "comment_count": (Comment, Count("id")),
+    "bookmark_count": (Bookmark, Count("id")),
+    "rating_count": (Rating, Count("id")),
+    "rating_sum": (Rating, Sum("value")),
+    **{f"rating_{value}": (Rating, Count("id", filter=Q(value=value))) for value in range(1, 6)},
+}
+
+
+# -------------------------
+# Incremental updates
+# -------------------------
+def adjust(post_id, **deltas):
+    """
+    Applies counter deltas to a post in a single UPDATE using F-expressions,
+    e.g. adjust(post.pk, like_count=1). Decrements are clamped at zero so a
+    drifted counter can never violate the positive-integer constraint.
+    Bumps the COUNTERS cache namespace, since these updates don't go
+    through save() and so trigger no other invalidation.
+    """
+    updates = {}
+    for field, delta in deltas.items():
+        if not delta:
+            continue
+        if delta < 0:
+            updates[field] = Greatest(F(field) + delta, Value(0))
+        else:
+            updates[field] = F(field) + delta
+    if updates:
+        Post.objects.filter(pk=post_id).update(**updates)
+        caching.bump(caching.COUNTERS)
+
+
+def is_post_cascade(origin):
+    """
+    True when a delete originates from a Post (or Post queryset). The post
+    rows are going away anyway, so per-row counter updates can be skipped.
+    """
+    if isinstance(origin, Post):
+        return True
+    return getattr(origin, "model", None) is Post
+
+
+# -------------------------
+# Reconciliation
+# -------------------------
+def actual_counts(post_ids):
+    """Returns {post_id: {field: value}} computed from the source tables."""
+    counts = {pk: {field: 0 for field in COUNTERS} for pk in post_ids}
+    for field, (model, aggregate) in COUNTERS.items():
+        rows = (
+            model.objects.filter(post_id__in=post_ids)
+            .order_by()
+            .values("post_id")
+            .annotate(n=aggregate)
+            .values_list("post_id", "n")
+        )
+        for post_id, n in rows:
+            counts[post_id][field] = n or 0
+    return counts
+
+
+def reconcile(batch_size=1000, stdout=None):
+    """
+    Recomputes every post's counters from the source tables in id-ordered
+    batches and bulk-updates only the posts whose stored values drifted.
+    Returns the number of posts corrected.
+    """
+    fields = list(COUNTERS)
+    last_id, fixed = 0, 0
+    while True:
+        posts = list(
+            Post.objects.filter(id__gt=last_id).order_by("id").only("id", *fields)[:batch_size]
+        )
+        if not posts:
+            break
+        last_id = posts[-1].id
+        actual = actual_counts([post.id for post in posts])
+        drifted = []
+        for post in posts:
+            expected = actual[post.id]
+            if any(getattr(post, field) != expected[field] for field in fields):
+                for field in fields:
+                    setattr(post, field, expected[field])
+                drifted.append(post)
+        if drifted:
+            with transaction.atomic():
+                Post.objects.bulk_update(drifted, fields, batch_size=batch_size)
+            fixed += len(drifted)
+            caching.bump(caching.COUNTERS)
+        if stdout is not None:
+            stdout.write(f"Checked posts up to id {last_id}, {fixed} corrected")
+    return fixed
@@ -0,0 +1,211 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from . import caching
+from .buffering import WriteBehindBuffer
+from .models import FeedItem, Follow, Post
+from .pagination import MergedKeysetPaginator
+
+FOLLOWS = "follows"
+BATCH_SIZE = 1000
+
+_buffer = None
+
+
+def fanout_limit():
+    """Followers above which a source's posts are read on demand instead of copied into feeds."""
+    return getattr(settings, "BLOG_FEED_FANOUT_LIMIT", 1000)
+
+
+def backfill_size():
+    return getattr(settings, "BLOG_FEED_BACKFILL", 200)
+
+
+# -------------------------
+# Sources
+# -------------------------
+def pull_sources():
+    """
+    {"author"|"tag"|"category": ids} of sources with more than
+    BLOG_FEED_FANOUT_LIMIT followers. Copying each of their posts to every
+    follower would cost more than querying them per read, so they are
+    fanned out on read. Cached for BLOG_CACHE_TIMEOUT; a source crossing
+    the limit changes mode at most that much later.
+    """
+    def compute():
+        sources = {target: set() for target in Follow.TARGETS}
+        # Each row has exactly one target, so grouping on all three counts per source
+        rows = (
+            Follow.objects.order_by().values(*Follow.TARGETS).annotate(n=Count("id"))
+            .filter(n__gt=fanout_limit()).values_list(*Follow.TARGETS)
+        )
+        for ids in rows:
+            for target, pk in zip(Follow.TARGETS, ids):
+                if pk is not None:
+                    sources[target].add(pk)
+        return sources
+
+    return caching.get_or_set(FOLLOWS, ("pull",), compute)
+
+
+def followed(user_id):
+    """{"author"|"tag"|"category": ids} the user follows."""
+    ids = {target: set() for target in Follow.TARGETS}
+    for author_id, tag_id, category_id in Follow.objects.filter(follower_id=user_id).values_list(
+        "author_id", "tag_id", "category_id"
+    ):
+        for target, pk in zip(Follow.TARGETS, (author_id, tag_id, category_id)):
+            if pk is not None:
+                ids[target].add(pk)
+    return ids
+
+
+def posts_from(sources):
+    """Live posts by any of the authors or in any of the tags or categories in ``sources``."""
+    condition = Q(pk__in=[])
+    if sources.get("author"):
+        condition |= Q(author_id__in=sources["author"])
+    if sources.get("category"):
+        condition |= Q(category_id__in=sources["category"])
+    if sources.get("tag"):
+        # Semi-join, so posts with several followed tags appear once
+        condition |= Q(id__in=Post.tags.through.objects.filter(tag_id__in=sources["tag"]).values("post_id"))
+    return Post.objects.live().filter(condition)
+
+
+def _without(sources, excluded):
+    return {target: ids - excluded[target] for target, ids in sources.items()}
+
+
+# -------------------------
+# Fan-out on write
+# -------------------------
+def fan_out(post_ids):
+    """
+    Copies live posts into the feeds of everyone following their author,
+    category or one of their tags, skipping sources fanned out on read.
+    Idempotent: re-running for a post only adds missing items. Returns the
+    number of items written.
+    """
+    posts = list(Post.objects.live().filter(pk__in=post_ids).values_list("id", "author_id", "category_id", "created_at"))
+    if not posts:
+        return 0
+    tags = defaultdict(set)
+    for post_id, tag_id in Post.tags.through.objects.filter(post_id__in=[row[0] for row in posts]).values_list(
+        "post_id", "tag_id"
+    ):
+        tags[post_id].add(tag_id)
+    sources = _without({
+        "author": {author_id for _pk, author_id, _category_id, _created_at in posts},
+        "category": {category_id for _pk, _author_id, category_id, _created_at in posts if category_id},
+        "tag": set().union(*tags.values()),
+    }, pull_sources())
+
+    followers = defaultdict(set)
+    rows = Follow.objects.filter(
+        Q(author_id__in=sources["author"]) | Q(tag_id__in=sources["tag"]) | Q(category_id__in=sources["category"])
+    ).values_list("follower_id", "author_id", "tag_id", "category_id")
+    for follower_id, author_id, tag_id, category_id in rows:
+        for target, pk in zip(Follow.TARGETS, (author_id, tag_id, category_id)):
+            if pk is not None:
+                followers[target, pk].add(follower_id)
+
+    items = []
+    for pk, author_id, category_id, created_at in posts:
+        users = followers[("author", author_id)] | followers[("category", category_id)]
+        users = users.union(*(followers[("tag", tag_id)] for tag_id in tags[pk]))
+        items.extend(FeedItem(user_id=user_id, post_id=pk, created_at=created_at) for user_id in users)
+    FeedItem.objects.bulk_create(items, batch_size=BATCH_SIZE, ignore_conflicts=True)
+    return len(items)
+
+
+def get_buffer():
+    global _buffer
+    if _buffer is None:
+        _buffer = WriteBehindBuffer(
+            lambda items: fan_out([post_id for post_id, _flag in items]),
+            interval=getattr(settings, "BLOG_FEED_FLUSH_INTERVAL", 2.0),
+            merge=lambda old, new: old,
+        )
+    return _buffer
+
+
+def mark_dirty(post_id):
+    """Schedules a post's fan-out after commit."""
+    transaction.on_commit(lambda: get_buffer().add(post_id, True))
+
+
+def _backfill(user_id, sources):
+    posts = (
+        posts_from(_without(sources, pull_sources()))
+        .order_by("-created_at", "-id")
+        .values_list("id", "created_at")[: backfill_size()]
+    )
+    FeedItem.objects.bulk_create(
+        [FeedItem(user_id=user_id, post_id=pk, created_at=created_at) for pk, created_at in posts],
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def rebuild(user_id):
+    """Replaces a user's feed with the newest BLOG_FEED_BACKFILL posts of everything they follow."""
+    with transaction.atomic():
+        FeedItem.objects.filter(user_id=user_id).delete()
+        _backfill(user_id, followed(user_id))
+
+
+# -------------------------
+# Following
+# -------------------------
+def toggle(user, target, pk):
+    """
+    Follows ``target`` (author, tag or category) ``pk``, or unfollows it if
+    already followed. Following backfills its recent posts into the feed;
+    unfollowing rebuilds the feed, since the removed posts may still be
+    justified by another follow. Returns True if the user now follows it.
+    """
+    with transaction.atomic():
+        deleted, _ = Follow.objects.filter(follower=user, **{f"{target}_id": pk}).delete()
+        if deleted:
+            rebuild(user.pk)
+            return False
+        Follow.objects.create(follower=user, **{f"{target}_id": pk})
+        _backfill(user.pk, {target: {pk}})
+    return True
+
+
+def is_following(user, target, pk):
+    return Follow.objects.filter(follower=user, **{f"{target}_id": pk}).exists()
+
+
+# -------------------------
+# Reading
+# -------------------------
+def feed_page(user, cursor=None, page_size=None):
+    """
+    One CursorPage of ``user``'s feed, newest first, keyed on
+    (created_at, post_id). Materialized items are one range scan of
+    feed_user_created_idx; followed sources over the fan-out limit add one
+    scan of their live posts, merged by the paginator. Posts are then
+    loaded with the feed() plan in one query plus tags. Raises
+    InvalidCursor for a malformed cursor.
+    """
+    scans = [
+        FeedItem.objects.filter(user=user, post__approved=True)
+        .exclude(post__status="scheduled")
+        .values("created_at", "post_id")
+    ]
+    pull = pull_sources()
+    if any(pull.values()):
+        hot = {target: ids & pull[target] for target, ids in followed(user.pk).items()}
+        if any(hot.values()):
+            scans.append(posts_from(hot).values("created_at", post_id=F("id")))
+
+    page = MergedKeysetPaginator(scans, page_size, field="created_at", tiebreaker="post_id").page(cursor)
+    posts = Post.objects.feed().in_bulk([row["post_id"] for row in page])
+    page.object_list = [posts[row["post_id"]] for row in page.object_list if row["post_id"] in posts]
+    return page
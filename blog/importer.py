@@ -0,0 +1,279 @@
+import csv
+import json
+import os
+from itertools import islice
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.text import slugify
+
+from . import caching, search
+from .bulk import explicit_timestamps, set_tags
+from .models import Category, Post, Tag
+
+STATUSES = {value for value, _label in Post.STATUS_CHOICES}
+
+
+class SkipRecord(ValueError):
+    pass
+
+
+# -------------------------
+# Readers
+# -------------------------
+def read_ndjson(fh):
+    """
+    One record per non-blank line. A malformed line yields a SkipRecord in
+    its place, so it is counted and checkpointed like any other record.
+    """
+    for line in fh:
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except ValueError as exc:
+                yield SkipRecord(f"invalid JSON: {exc}")
+
+
+def read_csv(fh):
+    yield from csv.DictReader(fh)
+
+
+def open_records(path, fmt=None):
+    """(file handle, record iterator) for an NDJSON or CSV file; the format defaults to the extension."""
+    fmt = fmt or ("csv" if path.lower().endswith(".csv") else "ndjson")
+    fh = open(path, encoding="utf-8", newline="")
+    return fh, (read_csv(fh) if fmt == "csv" else read_ndjson(fh))
+
+
+# -------------------------
+# Field parsing
+# -------------------------
+def _text(record, key):
+    value = record.get(key)
+    return value.strip() if isinstance(value, str) else value
+
+
+def _moment(record, key):
+    value = _text(record, key)
+    if not value:
+        return None
+    moment = parse_datetime(value)
+    if moment is None:
+        raise SkipRecord(f"{key}: not an ISO 8601 datetime")
+    return timezone.make_aware(moment) if timezone.is_naive(moment) else moment
+
+
+def _flag(record, key, default):
+    value = record.get(key)
+    if value in (None, ""):
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("1", "true", "yes", "y", "t")
+
+
+def _count(record, key):
+    value = _text(record, key)
+    if value in (None, ""):
+        return 0
+    if isinstance(value, str) and value.isdigit():
+        return int(value)
+    if isinstance(value, int) and not isinstance(value, bool) and value >= 0:
+        return value
+    raise SkipRecord(f"{key}: {value!r} is not a non-negative integer")
+
+
+def _tags(record):
+    value = record.get("tags") or []
+    if isinstance(value, str):
+        value = value.replace(",", "|").split("|")
+    elif not isinstance(value, list):
+        raise SkipRecord("tags: expected a list or a comma-separated string")
+    return [tag.strip() for tag in value if isinstance(tag, str) and tag.strip()]
+
+
+def _category(record):
+    value = _text(record, "category")
+    if value and not isinstance(value, str):
+        raise SkipRecord("category: expected a slug or name")
+    return value
+
+
+# -------------------------
+# Import
+# -------------------------
+class PostImporter:
+    """
+    Imports posts from records shaped like export_data's posts output
+    (title, content, author, category, tags, status, approved,
+    publish_date, views, created_at, updated_at; ids and counters are
+    ignored).
+
+    Categories and tags are resolved through in-memory slug and name maps
+    loaded once up front; unknown ones are created with one bulk_create per
+    batch. Each batch of posts, their tag links and their search index rows
+    are written in a single transaction, so a checkpoint taken after each
+    commit is always consistent with the database.
+    """
+
+    def __init__(self, batch_size=500, default_author=None, stdout=None):
+        self.batch_size = batch_size
+        self.stdout = stdout
+        self.categories = self._load_map(Category)
+        self.tags = self._load_map(Tag)
+        self.authors = {}
+        self.default_author_id = None
+        if default_author:
+            self.default_author_id = User.objects.values_list("id", flat=True).get(username=default_author)
+        self.imported = 0
+        self.skipped = 0
+        self.errors = []
+
+    @staticmethod
+    def _load_map(model):
+        """{slug: id} plus {name.lower(): id} for one taxonomy table."""
+        by_key = {}
+        for pk, name, slug in model.objects.values_list("id", "name", "slug"):
+            by_key[slug] = pk
+            by_key.setdefault(name.lower(), pk)
+        return by_key
+
+    def _resolve_taxonomy(self, model, known, values):
+        """Ids for the given slugs or names, creating missing rows in one insert."""
+        name_length = model._meta.get_field("name").max_length
+        slug_length = model._meta.get_field("slug").max_length
+        missing = {}
+        for value in values:
+            if value in known or value.lower() in known:
+                continue
+            slug = slugify(value)[:slug_length]
+            if not slug or slug in known:
+                continue
+            name = (value if slug != value else value.replace("-", " ").title())[:name_length]
+            if name.lower() not in known:
+                missing[slug] = model(name=name, slug=slug)
+        if missing:
+            model.objects.bulk_create(missing.values())
+            for obj in missing.values():
+                known[obj.slug] = obj.pk
+                known.setdefault(obj.name.lower(), obj.pk)
+
+    def _lookup(self, known, value):
+        return known.get(value) or known.get(value.lower()) or known.get(slugify(value))
+
+    def _resolve_authors(self, usernames):
+        unseen = set(usernames) - set(self.authors)
+        if unseen:
+            self.authors.update(User.objects.filter(username__in=unseen).values_list("username", "id"))
+            for username in unseen:
+                self.authors.setdefault(username, None)
+
+    def build(self, record, now):
+        """
+        (post, category, tag names) for a record, raising SkipRecord if it
+        can't be imported. The category and tags are resolved to ids later,
+        so skipped records never create any.
+        """
+        if isinstance(record, SkipRecord):
+            raise record
+        if not isinstance(record, dict):
+            raise SkipRecord("not a JSON object")
+        title = _text(record, "title")
+        if not title:
+            raise SkipRecord("title is required")
+        author = _text(record, "author") or ""
+        if not isinstance(author, str):
+            raise SkipRecord("author: expected a username")
+        author_id = self.authors.get(author) or self.default_author_id
+        if author_id is None:
+            raise SkipRecord(f"unknown author {record.get('author')!r}")
+        status = _text(record, "status") or "draft"
+        if status not in STATUSES:
+            raise SkipRecord(f"status: {status!r} is not one of {', '.join(sorted(STATUSES))}")
+        created_at = _moment(record, "created_at") or now
+        post = Post(
+            title=title[:Post._meta.get_field("title").max_length],
+            content=record.get("content") or "",
+            author_id=author_id,
+            status=status,
+            approved=_flag(record, "approved", True),
+            publish_date=_moment(record, "publish_date"),
+            views=_count(record, "views"),
+            created_at=created_at,
+            updated_at=_moment(record, "updated_at") or created_at,
+        )
+        return post, _category(record), _tags(record)
+
+    def import_batch(self, records, first_number):
+        now = timezone.now()
+        names = (record.get("author") for record in records if isinstance(record, dict))
+        self._resolve_authors(name.strip() for name in names if isinstance(name, str))
+        built = []
+        for number, record in enumerate(records, start=first_number):
+            try:
+                built.append(self.build(record, now))
+            except (SkipRecord, ValueError, TypeError) as exc:
+                self.skipped += 1
+                if len(self.errors) < 20:
+                    self.errors.append(f"record {number}: {exc}")
+        with transaction.atomic():
+            self._resolve_taxonomy(Category, self.categories, {category for _post, category, _tags in built if category})
+            self._resolve_taxonomy(Tag, self.tags, {tag for _post, _category, tags in built for tag in tags})
+            for post, category, _tags in built:
+                post.category_id = self._lookup(self.categories, category) if category else None
+            posts = [post for post, _category, _tags in built]
+            with explicit_timestamps(Post):
+                Post.objects.bulk_create(posts, batch_size=self.batch_size)
+            tag_ids = {post.pk: [self._lookup(self.tags, tag) for tag in tags] for post, _category, tags in built}
+            set_tags({pk: [tag for tag in ids if tag] for pk, ids in tag_ids.items() if any(ids)}, replace=False)
+            search.get_backend().index_rows(
+                [(post.pk, post.title, post.content) for post in posts if post.is_live()]
+            )
+        self.imported += len(posts)
+
+    def run(self, records, start=0, checkpoint=None):
+        """
+        Imports ``records`` (an iterator of dicts), skipping the first
+        ``start`` already-imported ones. ``checkpoint(consumed)`` is called
+        after every committed batch. Records that can't be imported are
+        counted in ``skipped`` but still consumed, so a resume moves past
+        them. Returns the number of records consumed.
+        """
+        records = islice(records, start, None)
+        consumed = start
+        try:
+            while True:
+                batch = list(islice(records, self.batch_size))
+                if not batch:
+                    break
+                self.import_batch(batch, consumed + 1)
+                consumed += len(batch)
+                if checkpoint is not None:
+                    checkpoint(consumed)
+                if self.stdout is not None:
+                    self.stdout.write(f"  {consumed:,} records, {self.imported:,} imported", ending="\r")
+        finally:
+            if self.imported:
+                caching.bump(caching.FEED, caching.TAXONOMY)
+        return consumed
+
+
+def load_checkpoint(path, source):
+    """Records already consumed from ``source`` according to the checkpoint file."""
+    try:
+        with open(path, encoding="utf-8") as fh:
+            state = json.load(fh)
+    except FileNotFoundError:
+        return 0
+    if state.get("source") != os.path.abspath(source):
+        raise ValueError(f"Checkpoint {path} belongs to {state.get('source')}")
+    return state["consumed"]
+
+
+def save_checkpoint(path, source, consumed):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump({"source": os.path.abspath(source), "consumed": consumed}, fh)
+    os.replace(tmp, path)
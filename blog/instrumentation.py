@@ -0,0 +1,292 @@
+import contextvars
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds, Prometheus style; the implicit last bucket is +Inf.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+_current = contextvars.ContextVar("blog_instrumentation", default=None)
+
+
+def sample_rate():
+    return getattr(settings, "BLOG_INSTRUMENTATION_SAMPLE_RATE", 0.1)
+
+
+def nplusone_threshold():
+    return getattr(settings, "BLOG_NPLUSONE_THRESHOLD", 5)
+
+
+def fingerprint(sql):
+    """
+    Normalizes a statement so queries differing only in their literals or
+    in the length of an IN list compare equal.
+    """
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _PLACEHOLDER_LIST.sub("(...)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+# -------------------------
+# Per-request recording
+# -------------------------
+class RequestRecorder:
+    """
+    Database execute-wrapper collecting timings for one sampled request.
+    Async views may run queries on several worker threads at once, hence
+    the lock.
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.fingerprints = Counter()
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.db_time += elapsed
+                self.queries += 1
+                self.fingerprints[fingerprint(sql)] += 1
+
+    def repeated(self, threshold):
+        """Fingerprints executed at least ``threshold`` times, most frequent first."""
+        return [(sql, n) for sql, n in self.fingerprints.most_common() if n >= threshold]
+
+
+def _timed_render(render):
+    def wrapper(self, *args, **kwargs):
+        recorder = _current.get()
+        if recorder is None:
+            return render(self, *args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            recorder.template_time += time.perf_counter() - started
+
+    wrapper.__wrapped__ = render
+    return wrapper
+
+
+def _dispatch(execute, sql, params, many, context):
+    recorder = _current.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def _attach(sender, connection, **kwargs):
+    if _dispatch not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_dispatch)
+
+
+def install():
+    """
+    Hooks sampled requests into query execution and template rendering.
+    Every connection gets an execute-wrapper that forwards to the current
+    request's recorder; the recorder lives in a context variable, which
+    sync_to_async copies into worker threads, so queries of async views
+    are attributed to their request too. Templates are timed on the
+    backend template, which render() and render_to_string() go through
+    once per call, so {% include %} isn't counted twice.
+    """
+    from django.template.backends.django import Template
+
+    connection_created.connect(_attach, dispatch_uid="blog.instrumentation")
+    if not hasattr(Template.render, "__wrapped__"):
+        Template.render = _timed_render(Template.render)
+
+
+# -------------------------
+# Aggregation
+# -------------------------
+class Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for index, bound in enumerate(BUCKETS):
+            if value <= bound:
+                break
+        else:
+            index = len(BUCKETS)
+        self.counts[index] += 1
+        self.total += value
+        self.count += 1
+
+
+class Registry:
+    """In-process metrics per view, read by the metrics endpoint."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency = defaultdict(Histogram)
+        self.db_time = defaultdict(Histogram)
+        self.queries = defaultdict(Counter)
+        self.template_time = defaultdict(float)
+        self.nplusone = defaultdict(int)
+
+    def observe(self, view, duration, recorder=None, repeated=()):
+        with self._lock:
+            self.latency[view].observe(duration)
+            if recorder is not None:
+                self.db_time[view].observe(recorder.db_time)
+                self.queries[view]["sampled"] += 1
+                self.queries[view]["queries"] += recorder.queries
+                self.template_time[view] += recorder.template_time
+                self.nplusone[view] += len(repeated)
+
+    def render(self):
+        """Prometheus text exposition of everything recorded so far."""
+        lines = []
+        with self._lock:
+            _histogram(lines, "blog_request_duration_seconds", "Request latency per view.", self.latency)
+            _histogram(lines, "blog_db_duration_seconds", "Database time per sampled request.", self.db_time)
+            _counter(lines, "blog_sampled_requests_total", "Requests profiled at the SQL level.",
+                     {view: c["sampled"] for view, c in self.queries.items()})
+            _counter(lines, "blog_db_queries_total", "Queries executed by sampled requests.",
+                     {view: c["queries"] for view, c in self.queries.items()})
+            _counter(lines, "blog_template_seconds_total", "Template render time of sampled requests.",
+                     self.template_time)
+            _counter(lines, "blog_nplusone_total", "Repeated query fingerprints over the N+1 threshold.",
+                     self.nplusone)
+        return lines
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+def _histogram(lines, name, help_text, series):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for view, histogram in sorted(series.items()):
+        running = 0
+        for bound, count in zip((*BUCKETS, "+Inf"), histogram.counts):
+            running += count
+            lines.append(f'{name}_bucket{{view="{_label(view)}",le="{bound}"}} {running}')
+        lines.append(f'{name}_sum{{view="{_label(view)}"}} {histogram.total:.6f}')
+        lines.append(f'{name}_count{{view="{_label(view)}"}} {histogram.count}')
+
+
+def _counter(lines, name, help_text, values, label="view"):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} counter")
+    for key, value in sorted(values.items()):
+        lines.append(f'{name}{{{label}="{_label(key)}"}} {value:g}')
+
+
+registry = Registry()
+
+
+def render_metrics():
+    """Request metrics plus cache and write-behind buffer gauges."""
+    from . import caching, feeds, notifications, realtime, related, trending, viewcount
+
+    lines = registry.render()
+    stats = caching.stats()
+    _counter(lines, "blog_cache_hits_total", "Versioned cache hits per namespace.",
+             {group: counts["hits"] for group, counts in stats.items()}, label="namespace")
+    _counter(lines, "blog_cache_misses_total", "Versioned cache misses per namespace.",
+             {group: counts["misses"] for group, counts in stats.items()}, label="namespace")
+    lines.append("# HELP blog_buffer_pending Keys waiting in write-behind buffers.")
+    lines.append("# TYPE blog_buffer_pending gauge")
+    buffers = (("feeds", feeds), ("notifications", notifications), ("related", related),
+               ("trending", trending), ("views", viewcount))
+    for name, module in buffers:
+        lines.append(f'blog_buffer_pending{{buffer="{name}"}} {module.get_buffer().pending()}')
+    lines.append("# HELP blog_sse_subscribers Open notification streams in this process.")
+    lines.append("# TYPE blog_sse_subscribers gauge")
+    lines.append(f"blog_sse_subscribers {realtime.get_broker().subscriber_count()}")
+    return "\n".join(lines) + "\n"
+
+
+# -------------------------
+# Middleware
+# -------------------------
+def _server_timing(duration, recorder):
+    parts = [f"total;dur={duration * 1000:.1f}"]
+    if recorder is not None:
+        parts.append(f'db;dur={recorder.db_time * 1000:.1f};desc="{recorder.queries} queries"')
+        parts.append(f"tpl;dur={recorder.template_time * 1000:.1f}")
+    return ", ".join(parts)
+
+
+class InstrumentationMiddleware:
+    """
+    Times every request into per-view latency histograms. A sampled share
+    of requests (BLOG_INSTRUMENTATION_SAMPLE_RATE) is also profiled at the
+    SQL and template level; those responses carry a Server-Timing header,
+    and statements repeated BLOG_NPLUSONE_THRESHOLD times or more within
+    one request are logged as likely N+1 queries. Works in sync and async
+    middleware chains, so it doesn't force async views back onto a thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder = RequestRecorder() if random.random() < sample_rate() else None
+        started = time.perf_counter()
+        token = _current.set(recorder)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, recorder, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        recorder = RequestRecorder() if random.random() < sample_rate() else None
+        started = time.perf_counter()
+        token = _current.set(recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, recorder, time.perf_counter() - started)
+
+    def finish(self, request, response, recorder, duration):
+        match = request.resolver_match
+        view = (match.view_name or match._func_path) if match else "unresolved"
+        repeated = recorder.repeated(nplusone_threshold()) if recorder is not None else ()
+        for sql, count in repeated:
+            logger.warning("Possible N+1 in %s: %d x %s", view, count, sql)
+        registry.observe(view, duration, recorder, repeated)
+
+        if recorder is not None:
+            timing = _server_timing(duration, recorder)
+            existing = response.get("Server-Timing")
+            response["Server-Timing"] = f"{existing}, {timing}" if existing else timing
+        return response
@@ -0,0 +1,162 @@
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+
+import django
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from django.utils import timezone
+
+from blog import caching
+from blog.models import Post
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = "Benchmark the hot endpoints against the current database and compare with a stored baseline"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=30, help="Timed requests per endpoint")
+        parser.add_argument("--warmup", type=int, default=3, help="Untimed requests per endpoint first")
+        parser.add_argument("--memory-samples", type=int, default=3, help="Requests traced for allocated memory")
+        parser.add_argument("--cold", action="store_true", help="Clear the blog cache before every request")
+        parser.add_argument("--username", help="User for authenticated endpoints (defaults to the most active author)")
+        parser.add_argument("--query", default="django", help="Search term for search_posts")
+        parser.add_argument("--output", help="Write JSON results to this file (default: stdout)")
+        parser.add_argument("--baseline", help="JSON results to compare against; exits non-zero on regression")
+        parser.add_argument("--tolerance", type=float, default=0.25,
+                            help="Allowed relative slowdown of p95 latency and memory before failing")
+
+    def endpoints(self, user, post):
+        return {
+            "home": (reverse("home"), False),
+            "search_posts": (reverse("search_posts") + f"?q={self.query}", False),
+            "post_detail": (reverse("post_detail", args=[post.pk]), False),
+            "profile": (reverse("profile", args=[user.username]), True),
+            "my_notifications": (reverse("my_notifications"), True),
+            "api_post_list": ("/api/posts/", False),
+            "api_post_detail": (f"/api/posts/{post.pk}/", False),
+        }
+
+    def handle(self, *args, **options):
+        self.query = options["query"]
+        user = (
+            User.objects.filter(username=options["username"]).first() if options["username"]
+            else User.objects.annotate(n_posts=Count("posts")).filter(n_posts__gt=0)
+            .order_by("-n_posts", "id").first()
+        )
+        post = Post.objects.live().order_by("-like_count", "-id").first()
+        if not (user and post):
+            raise CommandError("Needs a user with posts and a live post; run seed_data --profile small first.")
+
+        setup_test_environment()
+        try:
+            anonymous, signed_in = Client(), Client()
+            signed_in.force_login(user)
+            results = {}
+            for name, (url, needs_login) in self.endpoints(user, post).items():
+                client = signed_in if needs_login else anonymous
+                results[name] = self.measure(client, url, options)
+                self.stdout.write(
+                    f"{name:<18} p50 {results[name]['p50_ms']:8.2f} ms  p95 {results[name]['p95_ms']:8.2f} ms  "
+                    f"queries {results[name]['queries_max']:3d}  peak {results[name]['peak_kb']:9.1f} KiB"
+                )
+        finally:
+            teardown_test_environment()
+
+        report = {
+            "meta": {
+                "timestamp": timezone.now().isoformat(),
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+                "posts": Post.objects.count(),
+                "iterations": options["iterations"],
+                "cold": options["cold"],
+            },
+            "results": results,
+        }
+        payload = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as fh:
+                fh.write(payload + "\n")
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+        else:
+            self.stdout.write(payload)
+
+        if options["baseline"]:
+            with open(options["baseline"], encoding="utf-8") as fh:
+                baseline = json.load(fh)["results"]
+            regressions = self.compare(results, baseline, options["tolerance"])
+            for line in regressions:
+                self.stderr.write(line)
+            if regressions:
+                raise CommandError(f"{len(regressions)} regression(s) against {options['baseline']}")
+            self.stdout.write(self.style.SUCCESS("No regressions against baseline."))
+
+    def request(self, client, url, cold):
+        if cold:
+            caching.get_cache().clear()
+        response = client.get(url)
+        if response.status_code != 200:
+            raise CommandError(f"GET {url} returned {response.status_code}")
+        return response
+
+    def measure(self, client, url, options):
+        for _ in range(options["warmup"]):
+            self.request(client, url, options["cold"])
+
+        timings, queries = [], []
+        for _ in range(options["iterations"]):
+            with CaptureQueriesContext(connection) as context:
+                started = time.perf_counter()
+                self.request(client, url, options["cold"])
+                timings.append((time.perf_counter() - started) * 1000)
+            queries.append(len(context))
+
+        peaks = []
+        for _ in range(options["memory_samples"]):
+            tracemalloc.start()
+            try:
+                self.request(client, url, options["cold"])
+                peaks.append(tracemalloc.get_traced_memory()[1] / 1024)
+            finally:
+                tracemalloc.stop()
+
+        return {
+            "url": url,
+            "p50_ms": round(percentile(timings, 50), 3),
+            "p90_ms": round(percentile(timings, 90), 3),
+            "p95_ms": round(percentile(timings, 95), 3),
+            "p99_ms": round(percentile(timings, 99), 3),
+            "mean_ms": round(statistics.fmean(timings), 3),
+            "queries_mean": round(statistics.fmean(queries), 2),
+            "queries_max": max(queries),
+            "peak_kb": round(max(peaks), 1) if peaks else 0.0,
+        }
+
+    def compare(self, results, baseline, tolerance):
+        regressions = []
+        for name, current in results.items():
+            previous = baseline.get(name)
+            if previous is None:
+                continue
+            if current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+                regressions.append(f"{name}: p95 {current['p95_ms']} ms vs baseline {previous['p95_ms']} ms")
+            if current["queries_max"] > previous["queries_max"]:
+                regressions.append(f"{name}: {current['queries_max']} queries vs baseline {previous['queries_max']}")
+            if previous["peak_kb"] and current["peak_kb"] > previous["peak_kb"] * (1 + tolerance):
+                regressions.append(f"{name}: peak {current['peak_kb']} KiB vs baseline {previous['peak_kb']} KiB")
+        return regressions
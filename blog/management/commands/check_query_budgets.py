@@ -0,0 +1,56 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from blog.models import Post, Category, Tag
+from blog.testing import assert_view_query_budget
+
+
+class Command(BaseCommand):
+    help = "Request the listing views against the current database and fail if any exceeds its query budget"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--username", help="User to sign in as (defaults to the first superuser or user)")
+
+    def handle(self, *args, **options):
+        user = (
+            User.objects.filter(username=options["username"]).first() if options["username"]
+            else User.objects.order_by("-is_superuser", "id").first()
+        )
+        post = Post.objects.live().first()
+        category = Category.objects.first()
+        tag = Tag.objects.first()
+        if not (user and post):
+            raise CommandError("Needs at least one user and one live post; run seed_data first.")
+
+        urls = [reverse("home"), reverse("search_posts") + "?q=the", reverse("post_detail", args=[post.pk]),
+                reverse("profile", args=[user.username]), reverse("my_notifications"), reverse("trending"),
+                reverse("following_feed")]
+        if category:
+            urls.append(reverse("posts_by_category", args=[category.pk]))
+        if tag:
+            urls.append(reverse("posts_by_tag", args=[tag.pk]))
+
+        setup_test_environment()
+        try:
+            client = Client()
+            client.force_login(user)
+            # Prime the session (theme preference) so it isn't charged to the first view.
+            client.get(reverse("home"))
+            failures = 0
+            for url in urls:
+                try:
+                    assert_view_query_budget(client, url)
+                except AssertionError as exc:
+                    failures += 1
+                    self.stderr.write(f"{url}: {exc}")
+                else:
+                    self.stdout.write(f"{url}: ok")
+        finally:
+            teardown_test_environment()
+
+        if failures:
+            raise CommandError(f"{failures} view(s) over their query budget (see QUERY_BUDGETS in blog/testing.py)")
+        self.stdout.write(self.style.SUCCESS(f"All {len(urls)} views within budget."))
@@ -0,0 +1,56 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog import importer
+
+
+class Command(BaseCommand):
+    help = "Stream posts from an NDJSON or CSV file into the database in batches, resumably"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="NDJSON or CSV file, e.g. the output of export_data posts")
+        parser.add_argument("--format", choices=("ndjson", "csv"), help="Defaults to the file extension")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Records per bulk insert and transaction")
+        parser.add_argument("--default-author", help="Username for records whose author doesn't exist")
+        parser.add_argument("--checkpoint", help="Progress file; an interrupted import resumes from it")
+        parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint")
+
+    def handle(self, *args, **options):
+        path, checkpoint = options["path"], options["checkpoint"]
+        start = 0
+        if checkpoint and not options["restart"]:
+            try:
+                start = importer.load_checkpoint(checkpoint, path)
+            except ValueError as exc:
+                raise CommandError(f"{exc}; pass --restart to start over")
+            if start:
+                self.stdout.write(f"Resuming after record {start:,}")
+
+        try:
+            post_importer = importer.PostImporter(
+                batch_size=options["batch_size"], default_author=options["default_author"], stdout=self.stdout
+            )
+        except importer.User.DoesNotExist:
+            raise CommandError(f"No user named {options['default_author']!r}")
+
+        started = time.perf_counter()
+        fh, records = importer.open_records(path, options["format"])
+        with fh:
+            consumed = post_importer.run(
+                records,
+                start=start,
+                checkpoint=(lambda n: importer.save_checkpoint(checkpoint, path, n)) if checkpoint else None,
+            )
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write("")
+        for error in post_importer.errors:
+            self.stderr.write(f"Skipped {error}")
+        rate = post_importer.imported / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {post_importer.imported:,} posts ({post_importer.skipped:,} skipped) from "
+            f"{consumed - start:,} records in {elapsed:.1f}s ({rate:,.0f} posts/s)."
+        ))
+        if post_importer.imported:
+            self.stdout.write("Run rebuild_related_posts to include the new posts in related-post lists.")
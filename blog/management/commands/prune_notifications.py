@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from blog.notifications import prune_read
+
+
+class Command(BaseCommand):
+    help = "Delete (optionally archiving first) read notifications older than the retention period"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=int, default=getattr(settings, "BLOG_NOTIFICATION_RETENTION_DAYS", 90),
+            help="Keep read notifications newer than this many days",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows deleted per transaction")
+        parser.add_argument("--archive", help="Append pruned rows to this NDJSON file before deleting")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        if options["archive"]:
+            with open(options["archive"], "a", encoding="utf-8") as archive:
+                removed = prune_read(cutoff, options["batch_size"], archive=archive, stdout=self.stdout)
+        else:
+            removed = prune_read(cutoff, options["batch_size"], stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(f"Pruned {removed} read notifications older than {options['days']} days."))
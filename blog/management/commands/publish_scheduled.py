@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from blog.scheduler import publish_due
+
+
+class Command(BaseCommand):
+    help = "Publish scheduled posts whose publish_date has passed (once, or continuously with --loop)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="Posts published per UPDATE")
+        parser.add_argument("--loop", action="store_true", help="Keep running, checking every --interval seconds")
+        parser.add_argument("--interval", type=float, default=60.0, help="Seconds between checks with --loop")
+
+    def handle(self, *args, **options):
+        while True:
+            published = publish_due(batch_size=options["batch_size"])
+            if published or not options["loop"]:
+                self.stdout.write(self.style.SUCCESS(f"Published {published} scheduled posts."))
+            if not options["loop"]:
+                break
+            close_old_connections()
+            time.sleep(options["interval"])
@@ -0,0 +1,25 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from blog import feeds
+from blog.models import Follow
+
+
+class Command(BaseCommand):
+    help = "Rebuild personalized feeds from follows, e.g. after imports or changes to BLOG_FEED_FANOUT_LIMIT"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--username", help="Only rebuild this user's feed")
+
+    def handle(self, *args, **options):
+        if options["username"]:
+            try:
+                user_ids = [User.objects.values_list("id", flat=True).get(username=options["username"])]
+            except User.DoesNotExist:
+                raise CommandError(f"Unknown user {options['username']!r}")
+        else:
+            user_ids = list(Follow.objects.order_by("follower_id").values_list("follower_id", flat=True).distinct())
+        for user_id in user_ids:
+            feeds.rebuild(user_id)
+        rebuilt = len(user_ids)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rebuilt} feeds."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from blog.related import rebuild
+
+
+class Command(BaseCommand):
+    help = "Recompute the precomputed related-posts table for every live post"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--k", type=int, help="Neighbours per post (defaults to BLOG_RELATED_POSTS)")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Posts written per transaction")
+
+    def handle(self, *args, **options):
+        total = rebuild(k=options["k"], batch_size=options["batch_size"], stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(f"Related posts rebuilt ({total} posts)."))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from blog.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the post full-text search index from scratch"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Posts indexed per transaction")
+
+    def handle(self, *args, **options):
+        total = rebuild_index(batch_size=options["batch_size"], stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(f"Search index rebuilt ({total} posts)."))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from blog.counters import reconcile
+from blog.notifications import recount_unread
+
+
+class Command(BaseCommand):
+    help = "Recompute denormalized post counters and unread notification counters"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Posts checked per batch")
+
+    def handle(self, *args, **options):
+        fixed = reconcile(batch_size=options["batch_size"], stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(f"Counters reconciled ({fixed} posts corrected)."))
+        profiles = recount_unread()
+        self.stdout.write(self.style.SUCCESS(f"Unread notification counters recomputed ({profiles} profiles)."))
@@ -1,12 +1,55 @@
-from django.core.management.base import BaseCommand
-from blog.models import Category, Tag
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import F, Max
+from django.utils import timezone
 from django.utils.text import slugify
 
+from blog import search
+from blog.bulk import explicit_timestamps
+from blog.models import (
+    Category, Tag, Profile, Post, Comment, Like, Bookmark, Rating, Notification,
+)
+
+# Load profiles: users and posts to generate; everything else scales per post.
+PROFILES = {
+    "small": {"users": 200, "posts": 2_000},
+    "medium": {"users": 5_000, "posts": 100_000},
+    "large": {"users": 50_000, "posts": 1_000_000},
+    "huge": {"users": 200_000, "posts": 5_000_000},
+}
+
+WORDS = (
+    "django python query index cache latency database server request response template view model "
+    "feed post comment like bookmark rating tag category search page cursor scale batch worker async "
+    "travel food health fitness recipe learning machine data science design pattern test deploy "
+    "performance profile memory thread process signal queue stream export import trend score"
+).split()
+
 
 class Command(BaseCommand):
-    help = "Seed initial categories and tags"
+    help = "Seed categories and tags, and optionally a large synthetic data set for load testing"
 
-    def handle(self, *args, **kwargs):
+    def add_arguments(self, parser):
+        parser.add_argument("--profile", choices=sorted(PROFILES), help="Preset data volume to generate")
+        parser.add_argument("--users", type=int, help="Users to generate (overrides the profile)")
+        parser.add_argument("--posts", type=int, help="Posts to generate (overrides the profile)")
+        parser.add_argument("--comments-per-post", type=float, default=4.0, help="Mean comments per post")
+        parser.add_argument("--likes-per-post", type=float, default=8.0, help="Mean likes per post")
+        parser.add_argument("--bookmarks-per-post", type=float, default=2.0, help="Mean bookmarks per post")
+        parser.add_argument("--ratings-per-post", type=float, default=3.0, help="Mean ratings per post")
+        parser.add_argument("--notifications-per-user", type=float, default=10.0, help="Mean notifications per user")
+        parser.add_argument("--seed", type=int, default=42, help="Random seed; the same seed yields the same data")
+        parser.add_argument("--batch-size", type=int, default=5000, help="Rows per bulk_create")
+        parser.add_argument("--skip-search-index", action="store_true", help="Don't rebuild the search index afterwards")
+
+    def handle(self, *args, **options):
         categories = ["Technology", "Health", "Travel", "Education", "Food"]
         tags = ["Python", "Django", "AI", "Machine Learning", "Fitness", "Recipes"]
 
@@ -22,4 +65,220 @@ class Command(BaseCommand):
                 defaults={"slug": slugify(name)},
             )
 
-        self.stdout.write(self.style.SUCCESS("Categories and Tags seeded successfully!"))
\ No newline at end of file
+        self.stdout.write(self.style.SUCCESS("Categories and Tags seeded successfully!"))
+
+        volume = dict(PROFILES.get(options["profile"], {"users": 0, "posts": 0}))
+        for key in ("users", "posts"):
+            if options[key] is not None:
+                volume[key] = options[key]
+        if not volume["posts"] and not volume["users"]:
+            return
+        if volume["posts"] and not (volume["users"] or User.objects.exists()):
+            raise CommandError("Generating posts needs at least one user; pass --users.")
+
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.options = options
+        self.now = timezone.now()
+        self.stats = {}
+
+        started = time.perf_counter()
+        user_ids = self.generate_users(volume["users"])
+        self.generate_posts(volume["posts"], user_ids)
+        self.generate_notifications(user_ids)
+        self.reset_sequences()
+        elapsed = time.perf_counter() - started
+
+        total = sum(rows for rows, _seconds in self.stats.values())
+        for name, (rows, seconds) in self.stats.items():
+            self.stdout.write(f"  {name:<14} {rows:>12,} rows  {rows / max(seconds, 1e-9):>12,.0f} rows/sec")
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {total:,} rows in {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f} rows/sec)."
+        ))
+
+        if volume["posts"] and not options["skip_search_index"]:
+            search.rebuild_index(batch_size=self.batch_size)
+            self.stdout.write(self.style.SUCCESS("Search index rebuilt."))
+
+    # -------------------------
+    # Helpers
+    # -------------------------
+    def next_id(self, model):
+        return (model.objects.aggregate(n=Max("id"))["n"] or 0) + 1
+
+    def skewed(self, mean, cap):
+        """Heavy-tailed count with the given mean (Pareto, alpha=1.5)."""
+        if mean <= 0:
+            return 0
+        return min(cap, int((self.rng.paretovariate(1.5) - 1) * mean / 2))
+
+    def pick(self, population):
+        """Zipf-like choice: low indexes are picked far more often."""
+        return population[int(len(population) * self.rng.random() ** 3)]
+
+    def text(self, words):
+        return " ".join(self.pick(WORDS) for _ in range(words))
+
+    def timestamp_after(self, start):
+        span = max((self.now - start).total_seconds(), 1)
+        return start + timedelta(seconds=self.rng.random() ** 2 * span)
+
+    def insert(self, name, model, rows):
+        """bulk_creates a list of instances and records throughput under ``name``."""
+        started = time.perf_counter()
+        model.objects.bulk_create(rows, batch_size=self.batch_size)
+        total_rows, seconds = self.stats.get(name, (0, 0.0))
+        self.stats[name] = (total_rows + len(rows), seconds + time.perf_counter() - started)
+
+    def reset_sequences(self):
+        models = [User, Profile, Post, Post.tags.through, Comment, Like, Bookmark, Rating, Notification]
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                cursor.execute(sql)
+
+    # -------------------------
+    # Generators
+    # -------------------------
+    def generate_users(self, count):
+        """Creates ``count`` users with profiles; returns the ids to draw actors from."""
+        if not count:
+            return list(User.objects.order_by("id").values_list("id", flat=True)[:100_000])
+        first_id = self.next_id(User)
+        password = make_password("password")
+        joined = self.now - timedelta(days=730)
+        for offset in range(0, count, self.batch_size):
+            ids = range(first_id + offset, first_id + min(offset + self.batch_size, count))
+            users = [
+                User(id=pk, username=f"seed{pk}", email=f"seed{pk}@example.com",
+                     password=password, date_joined=self.timestamp_after(joined))
+                for pk in ids
+            ]
+            with transaction.atomic():
+                self.insert("users", User, users)
+                self.insert("profiles", Profile, [Profile(user_id=pk) for pk in ids])
+        return list(range(first_id, first_id + count))
+
+    def generate_posts(self, count, user_ids):
+        if not count:
+            return
+        opts = self.options
+        category_ids = list(Category.objects.values_list("id", flat=True))
+        tag_ids = list(Tag.objects.values_list("id", flat=True))
+        first_post = self.next_id(Post)
+        next_comment = self.next_id(Comment)
+        start = self.now - timedelta(days=365)
+        step = timedelta(days=365) / count
+        n_users = len(user_ids)
+
+        def engaged_users(n):
+            return self.rng.sample(user_ids, n) if n < n_users else list(user_ids)
+
+        # Posts are generated in chunks of batch_size so memory stays flat.
+        # Engagement is planned per post up front, so the denormalized
+        # counters are written correctly with the post itself.
+        for offset in range(0, count, self.batch_size):
+            plans = []
+            for i in range(offset, min(offset + self.batch_size, count)):
+                ratings = [
+                    self.rng.choice((1, 2, 3, 4, 4, 5, 5, 5))
+                    for _ in range(self.skewed(opts["ratings_per_post"], n_users))
+                ]
+                plans.append((
+                    first_post + i,
+                    start + step * i,
+                    self.skewed(opts["likes_per_post"], n_users),
+                    self.skewed(opts["bookmarks_per_post"], n_users),
+                    self.skewed(opts["comments_per_post"], 500),
+                    ratings,
+                ))
+
+            posts, tag_links, comments, likes, bookmarks, ratings = [], [], [], [], [], []
+            for post_id, created, n_likes, n_bookmarks, n_comments, values in plans:
+                posts.append(Post(
+                    id=post_id,
+                    title=self.text(self.rng.randint(4, 8)).capitalize(),
+                    content=self.text(self.rng.randint(60, 240)),
+                    author_id=self.pick(user_ids),
+                    category_id=self.rng.choice(category_ids) if category_ids else None,
+                    approved=self.rng.random() > 0.02,
+                    status="published",
+                    views=self.skewed(50 * opts["likes_per_post"], 10_000_000),
+                    created_at=created,
+                    updated_at=created,
+                    like_count=n_likes,
+                    comment_count=n_comments,
+                    bookmark_count=n_bookmarks,
+                    rating_sum=sum(values),
+                    rating_count=len(values),
+                    **{f"rating_{value}": values.count(value) for value in range(1, 6)},
+                ))
+                if tag_ids:
+                    for tag_id in {self.pick(tag_ids) for _ in range(self.rng.randint(0, 3))}:
+                        tag_links.append(Post.tags.through(post_id=post_id, tag_id=tag_id))
+                for user_id in engaged_users(n_likes):
+                    likes.append(Like(post_id=post_id, user_id=user_id, created_at=self.timestamp_after(created)))
+                for user_id in engaged_users(n_bookmarks):
+                    bookmarks.append(Bookmark(post_id=post_id, user_id=user_id, created_at=self.timestamp_after(created)))
+                for user_id, value in zip(engaged_users(len(values)), values):
+                    rated_at = self.timestamp_after(created)
+                    ratings.append(Rating(post_id=post_id, user_id=user_id, value=value,
+                                          created_at=rated_at, updated_at=rated_at))
+
+                # Comment ids are assigned here so reply paths exist before insert.
+                thread, at = [], created
+                for _ in range(n_comments):
+                    at = self.timestamp_after(at)
+                    parent = self.rng.choice(thread) if thread and self.rng.random() < 0.5 else None
+                    if parent is not None and parent.depth >= Comment.MAX_THREAD_DEPTH:
+                        parent = None
+                    segment = Comment.PATH_SEGMENT.format(next_comment)
+                    comment = Comment(
+                        id=next_comment, post_id=post_id, user_id=self.pick(user_ids),
+                        text=self.text(self.rng.randint(5, 40)), created_at=at,
+                        parent_id=parent.id if parent else None,
+                        root_id=(parent.root_id or parent.id) if parent else None,
+                        depth=parent.depth + 1 if parent else 0,
+                        path=f"{parent.path}/{segment}" if parent else segment,
+                    )
+                    thread.append(comment)
+                    comments.append(comment)
+                    next_comment += 1
+
+            with explicit_timestamps(Post, Comment, Like, Bookmark, Rating), transaction.atomic():
+                self.insert("posts", Post, posts)
+                self.insert("post tags", Post.tags.through, tag_links)
+                self.insert("comments", Comment, comments)
+                self.insert("likes", Like, likes)
+                self.insert("bookmarks", Bookmark, bookmarks)
+                self.insert("ratings", Rating, ratings)
+            self.stdout.write(f"  posts: {offset + len(plans):,}/{count:,}", ending="\r")
+
+    def generate_notifications(self, user_ids):
+        mean = self.options["notifications_per_user"]
+        if not mean or not user_ids:
+            return
+        post_ids = list(Post.objects.order_by("-id").values_list("id", flat=True)[:10_000])
+        if not post_ids:
+            return
+        for offset in range(0, len(user_ids), self.batch_size):
+            notifications, unread = [], {}
+            for user_id in user_ids[offset:offset + self.batch_size]:
+                for _ in range(self.skewed(mean, 10_000)):
+                    post_id = self.pick(post_ids)
+                    kind = self.rng.choice(("like", "like", "comment"))
+                    is_read = self.rng.random() < 0.7
+                    if not is_read:
+                        unread[user_id] = unread.get(user_id, 0) + 1
+                    notifications.append(Notification(
+                        user_id=user_id, kind=kind, post_id=post_id, is_read=is_read,
+                        message=f"Someone {'liked' if kind == 'like' else 'commented on'} your post",
+                        url=f"/post/{post_id}/",
+                        created_at=self.timestamp_after(self.now - timedelta(days=90)),
+                    ))
+            by_count = {}
+            for user_id, n in unread.items():
+                by_count.setdefault(n, []).append(user_id)
+            with explicit_timestamps(Notification), transaction.atomic():
+                self.insert("notifications", Notification, notifications)
+                for n, ids in by_count.items():
+                    Profile.objects.filter(user_id__in=ids).update(unread_notifications=F("unread_notifications") + n)
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from blog import trending
+
+
+class Command(BaseCommand):
+    help = "Decay trending scores and rewrite the ranked trending lists (once, or continuously with --loop)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--size", type=int, help="Posts per list (defaults to BLOG_TRENDING_SIZE)")
+        parser.add_argument("--rebuild", action="store_true",
+                            help="Recompute all scores from likes, comments and ratings first")
+        parser.add_argument("--loop", action="store_true", help="Keep running, snapshotting every --interval seconds")
+        parser.add_argument("--interval", type=float, default=300.0, help="Seconds between snapshots with --loop")
+
+    def handle(self, *args, **options):
+        if options["rebuild"]:
+            scored = trending.rebuild_scores(stdout=self.stdout)
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt trending scores for {scored} posts."))
+        decay_scores = not options["rebuild"]
+        while True:
+            entries = trending.snapshot(size=options["size"], stdout=self.stdout, decay_scores=decay_scores)
+            self.stdout.write(self.style.SUCCESS(f"Trending snapshot written ({entries} entries)."))
+            if not options["loop"]:
+                break
+            decay_scores = True
+            close_old_connections()
+            time.sleep(options["interval"])
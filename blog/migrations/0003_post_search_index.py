@@ -0,0 +1,35 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS blog_post_search "
+        "USING fts5(title, content, tokenize='unicode61 remove_diacritics 2')"
+    )
+    # Weight title matches 10x over body matches in bm25 ranking.
+    schema_editor.execute(
+        "INSERT INTO blog_post_search(blog_post_search, rank) VALUES ('rank', 'bm25(10.0, 1.0)')"
+    )
+    schema_editor.execute(
+        "INSERT INTO blog_post_search(rowid, title, content) "
+        "SELECT id, title, content FROM blog_post WHERE approved"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS blog_post_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0002_post_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
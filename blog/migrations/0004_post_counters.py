@@ -0,0 +1,60 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:48
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    sources = {
+        'like_count': (apps.get_model('blog', 'Like'), Count('id')),
+        'comment_count': (apps.get_model('blog', 'Comment'), Count('id')),
+        'bookmark_count': (apps.get_model('blog', 'Bookmark'), Count('id')),
+        'rating_count': (apps.get_model('blog', 'Rating'), Count('id')),
+        'rating_sum': (apps.get_model('blog', 'Rating'), Sum('value')),
+    }
+    updates = {}
+    for field, (model, aggregate) in sources.items():
+        subquery = (
+            model.objects.filter(post=OuterRef('pk'))
+            .order_by().values('post').annotate(n=aggregate).values('n')
+        )
+        updates[field] = Coalesce(Subquery(subquery, output_field=IntegerField()), 0)
+    Post.objects.update(**updates)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0003_post_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='bookmark_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_unread(apps, schema_editor):
+    Profile = apps.get_model('blog', 'Profile')
+    Notification = apps.get_model('blog', 'Notification')
+    unread = (
+        Notification.objects.filter(user=OuterRef('user'), is_read=False)
+        .order_by().values('user').annotate(n=Count('id')).values('n')
+    )
+    Profile.objects.update(unread_notifications=Coalesce(Subquery(unread, output_field=IntegerField()), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0004_post_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='actor_count',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='kind',
+            field=models.CharField(choices=[('comment', 'Comment'), ('like', 'Like'), ('other', 'Other')], default='other', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='post',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='blog.post'),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='unread_notifications',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_unread, migrations.RunPython.noop),
+    ]
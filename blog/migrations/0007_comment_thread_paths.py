@@ -0,0 +1,69 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:53
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_thread_paths(apps, schema_editor):
+    Comment = apps.get_model('blog', 'Comment')
+    parents = dict(Comment.objects.values_list('id', 'parent_id'))
+    positions = {}
+
+    def position(pk):
+        # (root_id, depth, path) for a comment, resolving ancestors first
+        stack = []
+        while pk not in positions:
+            stack.append(pk)
+            parent_id = parents.get(pk)
+            if parent_id is None:
+                segment = f"{pk:010d}"
+                positions[pk] = (None, 0, segment)
+                stack.pop()
+                break
+            pk = parent_id
+        for child in reversed(stack):
+            root_id, depth, path = positions[parents[child]]
+            positions[child] = (root_id or parents[child], depth + 1, f"{path}/{child:010d}")
+
+    updated = []
+    for comment in Comment.objects.only('id', 'parent_id').iterator():
+        position(comment.id)
+        comment.root_id, comment.depth, comment.path = positions[comment.id]
+        updated.append(comment)
+    Comment.objects.bulk_update(updated, ['root', 'depth', 'path'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0006_notification_inbox_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='root',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='blog.comment'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'depth', 'created_at', 'id'], name='comment_post_roots_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['root', 'path'], name='comment_thread_path_idx'),
+        ),
+        migrations.RunPython(backfill_thread_paths, migrations.RunPython.noop),
+    ]
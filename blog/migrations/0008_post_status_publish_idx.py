@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_comment_thread_paths'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['status', 'publish_date'], name='post_status_publish_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:09
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0010_post_api_filter_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.PositiveIntegerField()),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('computed_at', models.DateTimeField()),
+            ],
+            options={
+                'ordering': ['scope', 'rank'],
+            },
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='trend_score',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-trend_score'], name='post_trend_score_idx'),
+        ),
+        migrations.AddField(
+            model_name='trendingentry',
+            name='post',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trending_entries', to='blog.post'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='trendingentry',
+            unique_together={('scope', 'rank')},
+        ),
+    ]
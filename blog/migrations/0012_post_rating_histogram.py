@@ -0,0 +1,54 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:12
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_histogram(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    Rating = apps.get_model('blog', 'Rating')
+    updates = {}
+    for value in range(1, 6):
+        subquery = (
+            Rating.objects.filter(post=OuterRef('pk'), value=value)
+            .order_by().values('post').annotate(n=Count('id')).values('n')
+        )
+        updates[f'rating_{value}'] = Coalesce(Subquery(subquery, output_field=IntegerField()), 0)
+    Post.objects.filter(rating_count__gt=0).update(**updates)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0011_trending'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='rating_1',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='rating_2',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='rating_3',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='rating_4',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='rating_5',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_histogram, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:44
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_updated_at(apps, schema_editor):
+    # The best known time for existing rows; earlier changes weren't tracked
+    Rating = apps.get_model('blog', 'Rating')
+    Rating.objects.update(updated_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0013_follow_feed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rating',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,6 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
+from django.db.models.functions import Substr
 from django.utils import timezone
 
 # -------------------------
@@ -16,6 +17,8 @@ class Profile(models.Model):
         choices=[("light", "Light"), ("dark", "Dark")],
         default="light"
     )
+    # Maintained by blog/notifications.py so the badge never needs COUNT(*)
+    unread_notifications = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return f"{self.user.username}'s profile"
@@ -52,6 +55,32 @@ class Tag(models.Model):
 # -------------------------
 # Post Model
 # -------------------------
+class PostQuerySet(models.QuerySet):
+    EXCERPT_LENGTH = 300
+
+    def live(self):
+        """
+        Posts that may be listed: approved, and not still waiting on the
+        scheduler. Scheduled posts are flipped to published by
+        blog/scheduler.py once their publish_date passes.
+        """
+        return self.filter(approved=True).exclude(status="scheduled")
+
+    def feed(self):
+        """
+        Query plan for post listings: author and category joined in, tags
+        prefetched in one extra query, and the full content replaced by a
+        short excerpt. Engagement counts come from the denormalized counter
+        columns, so no aggregate joins are needed.
+        """
+        return (
+            self.select_related("author", "category")
+            .prefetch_related("tags")
+            .defer("content")
+            .annotate(excerpt=Substr("content", 1, self.EXCERPT_LENGTH))
+        )
+
+
 class Post(models.Model):
     STATUS_CHOICES = (
         ('draft', 'Draft'),
@@ -71,12 +100,65 @@ class Post(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Denormalized engagement counters, maintained by blog/counters.py
+    like_count = models.PositiveIntegerField(default=0, editable=False)
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    bookmark_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+    # Rating histogram: how many 1..5 star ratings the post has
+    rating_1 = models.PositiveIntegerField(default=0, editable=False)
+    rating_2 = models.PositiveIntegerField(default=0, editable=False)
+    rating_3 = models.PositiveIntegerField(default=0, editable=False)
+    rating_4 = models.PositiveIntegerField(default=0, editable=False)
+    rating_5 = models.PositiveIntegerField(default=0, editable=False)
+
+    # Time-decayed engagement score, maintained by blog/trending.py
+    trend_score = models.FloatField(default=0, editable=False)
+
+    # Only ever changed with F() updates (blog/counters.py, blog/viewcount.py,
+    # blog/trending.py), so save() leaves them alone unless asked to
+    COUNTER_FIELDS = (
+        "views", "like_count", "comment_count", "bookmark_count", "rating_sum", "rating_count",
+        "rating_1", "rating_2", "rating_3", "rating_4", "rating_5", "trend_score",
+    )
+
+    objects = PostQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination seeks on (created_at, id), see blog/pagination.py
+            models.Index(fields=['-created_at', '-id'], name='post_created_id_idx'),
+            # The scheduler's "due posts" scan
+            models.Index(fields=['status', 'publish_date'], name='post_status_publish_idx'),
+            # Filtered and reordered /api/posts/ listings, see blog/api/filters.py
+            models.Index(fields=['category', '-created_at', '-id'], name='post_category_created_idx'),
+            models.Index(fields=['author', '-created_at', '-id'], name='post_author_created_idx'),
+            models.Index(fields=['status', '-created_at', '-id'], name='post_status_created_idx'),
+            models.Index(fields=['-updated_at', '-id'], name='post_updated_id_idx'),
+            models.Index(fields=['-like_count', '-id'], name='post_likes_id_idx'),
+            # Scored posts scanned by trending snapshots
+            models.Index(fields=['-trend_score'], name='post_trend_score_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        """
+        Updates write every loaded column except the counters, which may
+        have moved since this instance was loaded; name them in
+        ``update_fields`` to overwrite them deliberately.
+        """
+        if not self._state.adding and kwargs.get("update_fields") is None and not kwargs.get("force_insert"):
+            deferred = self.get_deferred_fields()
+            kwargs["update_fields"] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in deferred and field.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
     def is_visible(self):
         if self.status == "published":
             return True
@@ -84,26 +166,132 @@ class Post(models.Model):
             return self.publish_date <= timezone.now()
         return False
 
+    def is_live(self):
+        """Instance counterpart of PostQuerySet.live()."""
+        return self.approved and self.status != "scheduled"
+
+    @property
+    def rating_mean(self):
+        """Average stars from the denormalized counters; see blog/ratings.py for the weighted score."""
+        return self.rating_sum / self.rating_count if self.rating_count else None
+
     def related_posts(self):
-        return Post.objects.filter(category=self.category).exclude(id=self.id)[:5]
+        """
+        Precomputed neighbours from blog/related.py, read with one indexed
+        lookup. Falls back to live same-category posts until the index has
+        an entry for this post; uncategorized posts have no fallback.
+        """
+        related = list(
+            Post.objects.live().filter(related_as__post=self).order_by("related_as__rank")[:5]
+        )
+        if related:
+            return related
+        if self.category_id is None:
+            return Post.objects.none()
+        return Post.objects.live().filter(category_id=self.category_id).exclude(id=self.id)[:5]
+
+
+# -------------------------
+# Related Post Model
+# -------------------------
+class RelatedPost(models.Model):
+    """
+    Top-K similar posts per post, ranked 0..K-1, maintained by
+    blog/related.py.
+    """
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='related_entries')
+    related = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='related_as')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ['post', 'rank']
+        unique_together = ('post', 'rank')
+
+    def __str__(self):
+        return f"{self.post_id} -> {self.related_id} (#{self.rank})"
+
+
+# -------------------------
+# Trending Model
+# -------------------------
+class TrendingEntry(models.Model):
+    """
+    Latest trending snapshot: the top posts by decayed engagement score,
+    ranked 0..N-1 per scope (0 = site-wide, otherwise a category id).
+    Rewritten by blog/trending.py.
+    """
+    scope = models.PositiveIntegerField()
+    rank = models.PositiveSmallIntegerField()
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='trending_entries')
+    score = models.FloatField()
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['scope', 'rank']
+        unique_together = ('scope', 'rank')
+
+    def __str__(self):
+        return f"{self.scope}#{self.rank}: {self.post_id}"
 
 
 # -------------------------
 # Comment Model
 # -------------------------
 class Comment(models.Model):
+    # Each path segment is a zero-padded id plus a separator, so 255 chars
+    # hold 23 levels; deeper replies are attached at MAX_THREAD_DEPTH.
+    PATH_SEGMENT = "{:010d}"
+    MAX_THREAD_DEPTH = 20
+
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='comments')
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     text = models.TextField()
     parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='replies')
+    # Materialized thread position, see blog/threads.py
+    root = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='+', editable=False)
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
+    path = models.CharField(max_length=255, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # Top-level threads of a post, paged on (created_at, id)
+            models.Index(fields=['post', 'depth', 'created_at', 'id'], name='comment_post_roots_idx'),
+            # Whole thread in display order with one range scan
+            models.Index(fields=['root', 'path'], name='comment_thread_path_idx'),
+        ]
 
     def __str__(self):
         return f'Comment by {self.user.username} on {self.post.title}'
 
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            return super().save(*args, **kwargs)
+        parent = self.parent
+        while parent is not None and parent.depth >= self.MAX_THREAD_DEPTH:
+            parent = parent.parent
+        self.parent = parent
+        if parent is not None:
+            self.depth = parent.depth + 1
+            self.root_id = parent.root_id or parent.pk
+        # The insert and the path update below commit or fail together
+        with transaction.atomic(using=kwargs.get("using")):
+            super().save(*args, **kwargs)
+
+    def _save_table(self, raw=False, cls=None, force_insert=False, force_update=False, using=None,
+                    update_fields=None):
+        updated = super()._save_table(raw, cls, force_insert, force_update, using, update_fields)
+        if not updated and not self.path:
+            # The path ends in the new row's id, so it can only be written
+            # after the insert; doing it here, before save_base() sends
+            # post_save, means receivers never see a comment without one.
+            segment = self.PATH_SEGMENT.format(self.pk)
+            self.path = f"{self.parent.path}/{segment}" if self.parent_id else segment
+            Comment._base_manager.using(using).filter(pk=self.pk).update(path=self.path)
+        return updated
+
 
 # -------------------------
 # Like Model
@@ -143,10 +331,19 @@ class Rating(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     value = models.IntegerField(choices=[(i, str(i)) for i in range(1, 6)])  # 1-5 stars
     created_at = models.DateTimeField(auto_now_add=True)
+    # Changed ratings are picked up by incremental exports
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ('post', 'user')
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored value so counters can apply the difference on update
+        instance._loaded_value = instance.__dict__.get('value')
+        return instance
+
     def __str__(self):
         return f"{self.user.username} rated {self.post.title} {self.value} stars"
 
@@ -155,11 +352,88 @@ class Rating(models.Model):
 # Notification Model
 # -------------------------
 class Notification(models.Model):
+    KIND_CHOICES = (
+        ('comment', 'Comment'),
+        ('like', 'Like'),
+        ('other', 'Other'),
+    )
+
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="notifications")
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, default='other')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, null=True, blank=True, related_name="+")
+    actor_count = models.PositiveIntegerField(default=1)
     message = models.CharField(max_length=255)
     url = models.CharField(max_length=200, blank=True, null=True)
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Inbox pages seek on (created_at, id) within one user
+            models.Index(fields=['user', '-created_at', '-id'], name='notif_user_created_idx'),
+            # Unread filter, bulk mark-read and retention scans
+            models.Index(fields=['user', 'is_read', '-created_at'], name='notif_user_read_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"Notification for {self.user.username}"
+
+# -------------------------
+# Follow Model
+# -------------------------
+class Follow(models.Model):
+    """A user following exactly one author, tag or category."""
+    follower = models.ForeignKey(User, on_delete=models.CASCADE, related_name="follows")
+    author = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name="followers")
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, null=True, blank=True, related_name="followers")
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, null=True, blank=True, related_name="followers")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    TARGETS = ("author", "tag", "category")
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                condition=(
+                    models.Q(author__isnull=False, tag__isnull=True, category__isnull=True)
+                    | models.Q(author__isnull=True, tag__isnull=False, category__isnull=True)
+                    | models.Q(author__isnull=True, tag__isnull=True, category__isnull=False)
+                ),
+                name="follow_one_target",
+            ),
+            models.UniqueConstraint(fields=['follower', 'author'], condition=models.Q(author__isnull=False),
+                                    name="follow_unique_author"),
+            models.UniqueConstraint(fields=['follower', 'tag'], condition=models.Q(tag__isnull=False),
+                                    name="follow_unique_tag"),
+            models.UniqueConstraint(fields=['follower', 'category'], condition=models.Q(category__isnull=False),
+                                    name="follow_unique_category"),
+        ]
+
+    def __str__(self):
+        target = self.author or self.tag or self.category
+        return f"{self.follower.username} follows {target}"
+
+
+# -------------------------
+# Feed Item Model
+# -------------------------
+class FeedItem(models.Model):
+    """
+    A post delivered to a follower's personalized feed by blog/feeds.py.
+    created_at copies the post's so feed pages seek on this table alone.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="feed_items")
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="feed_items")
+    created_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'post'], name="feed_item_unique"),
+        ]
+        indexes = [
+            # Feed pages seek on (created_at, post) within one user
+            models.Index(fields=['user', '-created_at', '-post'], name='feed_user_created_idx'),
+        ]
+
     def __str__(self):
-        return f"Notification for {self.user.username}"
\ No newline at end of file
+        return f"{self.post_id} in {self.user.username}'s feed"
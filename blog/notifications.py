@@ -0,0 +1,212 @@
+import json
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.dispatch import Signal
+
+from .buffering import WriteBehindBuffer
+from .models import Post, Profile, Notification
+
+_buffer = None
+
+# Sent with ``instances`` after deliver() writes a batch; bulk_create skips post_save.
+delivered = Signal()
+
+VERBS = {
+    "comment": "commented on",
+    "like": "liked",
+}
+
+
+# -------------------------
+# Enqueue
+# -------------------------
+def notify(kind, post_id, actor_id):
+    """
+    Queues a "<actor> <verb> your post" event for the post's author once the
+    current transaction commits. Events for the same post and kind are
+    coalesced until the next flush, so a burst of likes becomes a single
+    "12 people liked your post" notification.
+    """
+    transaction.on_commit(lambda: get_buffer().add((kind, post_id), [actor_id]))
+
+
+def get_buffer():
+    global _buffer
+    if _buffer is None:
+        _buffer = WriteBehindBuffer(
+            deliver,
+            interval=getattr(settings, "BLOG_NOTIFICATION_FLUSH_INTERVAL", 2.0),
+            max_pending=getattr(settings, "BLOG_NOTIFICATION_MAX_PENDING", 500),
+            batch_size=getattr(settings, "BLOG_NOTIFICATION_BATCH_SIZE", 500),
+        )
+    return _buffer
+
+
+def flush():
+    return get_buffer().flush()
+
+
+# -------------------------
+# Deliver
+# -------------------------
+def format_message(kind, names, total, title):
+    verb = VERBS.get(kind, "interacted with")
+    if total == 1:
+        who = names[0]
+    elif total == 2:
+        who = f"{names[0]} and {names[1]}"
+    else:
+        who = f"{total} people"
+    return f"{who} {verb} your post '{title}'"[:255]
+
+
+def deliver(items):
+    """
+    Flush callback: turns coalesced ((kind, post_id), [actor ids]) events into
+    Notification rows. Post authors and titles and actor usernames are
+    resolved with one query each, rows are written with a single
+    bulk_create, and the recipients' unread counters are bumped in the
+    same transaction. Returns the created notifications.
+    """
+    posts = {
+        pk: (author_id, title)
+        for pk, author_id, title in Post.objects.filter(
+            pk__in={post_id for (_kind, post_id), _actors in items}
+        ).values_list("id", "author_id", "title")
+    }
+
+    events = []
+    for (kind, post_id), actor_ids in items:
+        if post_id not in posts:
+            continue  # post deleted meanwhile
+        author_id, title = posts[post_id]
+        actors = [pk for pk in dict.fromkeys(actor_ids) if pk != author_id]
+        if actors:
+            events.append((kind, post_id, author_id, title, actors))
+    if not events:
+        return []
+
+    names = dict(
+        User.objects.filter(pk__in={pk for event in events for pk in event[4][:2]})
+        .values_list("id", "username")
+    )
+    notifications = [
+        Notification(
+            user_id=author_id,
+            kind=kind,
+            post_id=post_id,
+            actor_count=len(actors),
+            message=format_message(kind, [names.get(pk, "Someone") for pk in actors[:2]], len(actors), title),
+            url=f"/post/{post_id}/",
+        )
+        for kind, post_id, author_id, title, actors in events
+    ]
+
+    with transaction.atomic():
+        Notification.objects.bulk_create(notifications)
+        add_unread(_count_by_user(notifications))
+    delivered.send(sender=Notification, instances=notifications)
+    return notifications
+
+
+def _count_by_user(notifications):
+    counts = defaultdict(int)
+    for notification in notifications:
+        counts[notification.user_id] += 1
+    return counts
+
+
+# -------------------------
+# Unread counters
+# -------------------------
+def add_unread(counts):
+    """
+    Applies {user_id: delta} to Profile.unread_notifications, one UPDATE per
+    distinct delta. Negative deltas are clamped at zero.
+    """
+    by_delta = defaultdict(list)
+    for user_id, delta in counts.items():
+        if delta:
+            by_delta[delta].append(user_id)
+    for delta, user_ids in by_delta.items():
+        value = F("unread_notifications") + delta
+        if delta < 0:
+            value = Greatest(value, Value(0))
+        Profile.objects.filter(user_id__in=user_ids).update(unread_notifications=value)
+
+
+def discard_post(post_id):
+    """
+    Takes a post's unread notifications off their recipients' counters.
+    Call before deleting the post: the rows go with it by cascade, which
+    doesn't pass through mark_read().
+    """
+    counts = (
+        Notification.objects.filter(post_id=post_id, is_read=False)
+        .order_by().values("user").annotate(n=Count("id")).values_list("user", "n")
+    )
+    add_unread({user_id: -n for user_id, n in counts})
+
+
+def recount_unread():
+    """Recomputes every profile's unread counter from the Notification table."""
+    unread = (
+        Notification.objects.filter(user=OuterRef("user"), is_read=False)
+        .order_by().values("user").annotate(n=Count("id")).values("n")
+    )
+    return Profile.objects.update(
+        unread_notifications=Coalesce(Subquery(unread, output_field=IntegerField()), 0)
+    )
+
+
+# -------------------------
+# Inbox maintenance
+# -------------------------
+def mark_read(user, ids=None):
+    """
+    Marks the user's unread notifications (all, or just ``ids``) as read
+    with a single UPDATE and adjusts the unread counter by the number of
+    rows changed. Returns that number.
+    """
+    unread = Notification.objects.filter(user=user, is_read=False)
+    if ids is not None:
+        unread = unread.filter(pk__in=ids)
+    with transaction.atomic():
+        updated = unread.update(is_read=True)
+        add_unread({user.pk: -updated})
+    return updated
+
+
+def prune_read(older_than, batch_size=1000, archive=None, stdout=None):
+    """
+    Deletes read notifications created before ``older_than`` in id-ordered
+    chunks, one short transaction each, so the table can be trimmed while
+    the site is live. When ``archive`` (a text file) is given, each chunk
+    is appended to it as NDJSON before being deleted. Returns the number of
+    rows removed.
+    """
+    stale = Notification.objects.filter(is_read=True, created_at__lt=older_than).order_by("id")
+    last_id, removed = 0, 0
+    while True:
+        rows = list(
+            stale.filter(id__gt=last_id).values(
+                "id", "user_id", "kind", "post_id", "actor_count", "message", "url", "created_at"
+            )[:batch_size]
+        )
+        if not rows:
+            break
+        last_id = rows[-1]["id"]
+        if archive is not None:
+            for row in rows:
+                archive.write(json.dumps(row, cls=DjangoJSONEncoder) + "\n")
+        with transaction.atomic():
+            removed += Notification.objects.filter(id__in=[row["id"] for row in rows]).delete()[0]
+        if stdout is not None:
+            stdout.write(f"Removed {removed} notifications (last id {last_id})")
+    return removed
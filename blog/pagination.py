@@ -0,0 +1,199 @@
+import base64
+import json
+from datetime import datetime
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from django.http import Http404
+
+
+# Largest magnitude a cursor key may carry; 64-bit integer columns can't compare with more
+MAX_KEY = 2 ** 63 - 1
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+# -------------------------
+# Page size
+# -------------------------
+def get_page_size(request, param="page_size"):
+    """
+    Returns the page size requested via ?page_size=, clamped to
+    BLOG_MAX_PAGE_SIZE. Falls back to BLOG_PAGE_SIZE.
+    """
+    default = getattr(settings, "BLOG_PAGE_SIZE", 20)
+    maximum = getattr(settings, "BLOG_MAX_PAGE_SIZE", 100)
+    try:
+        size = int(request.GET.get(param, default))
+    except (TypeError, ValueError):
+        size = default
+    return max(1, min(size, maximum))
+
+
+# -------------------------
+# Cursor page
+# -------------------------
+class CursorPage:
+    def __init__(self, object_list, next_cursor=None, prev_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.prev_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+# -------------------------
+# Keyset paginator
+# -------------------------
+class KeysetPaginator:
+    """
+    Seek-based pagination over (field, tiebreaker), e.g. (created_at, id).
+
+    Each page is a range scan starting right after the last row of the
+    previous page, so page N costs the same as page 1 given an index on
+    both columns. Cursors are opaque url-safe tokens that carry the
+    direction and the boundary row's key.
+    """
+
+    def __init__(self, queryset, page_size=None, field="created_at", tiebreaker="pk", descending=True):
+        self.queryset = queryset
+        self.page_size = page_size or getattr(settings, "BLOG_PAGE_SIZE", 20)
+        self.field = field
+        self.tiebreaker = tiebreaker
+        self.descending = descending
+
+    def page(self, cursor=None):
+        direction, position = self.decode(cursor) if cursor else ("n", None)
+        backwards = direction == "p"
+
+        rows = self.fetch(position, backwards)
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+
+        if backwards:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, position is not None
+
+        next_cursor = self.encode("n", rows[-1]) if rows and has_next else None
+        prev_cursor = self.encode("p", rows[0]) if rows and has_previous else None
+        return CursorPage(rows, next_cursor, prev_cursor)
+
+    def fetch(self, position, backwards):
+        """Up to page_size + 1 rows past ``position``, in scan order."""
+        return self._scan(self.queryset, position, backwards)
+
+    def _scan(self, queryset, position, backwards):
+        if position is not None:
+            queryset = queryset.filter(self._seek(position, backwards))
+        return list(queryset.order_by(*self._ordering(backwards))[: self.page_size + 1])
+
+    def _ordering(self, backwards):
+        prefix = "-" if self.descending != backwards else ""
+        return (f"{prefix}{self.field}", f"{prefix}{self.tiebreaker}")
+
+    def _seek(self, position, backwards):
+        value, key = position
+        op = "lt" if self.descending != backwards else "gt"
+        return Q(**{f"{self.field}__{op}": value}) | Q(
+            **{self.field: value, f"{self.tiebreaker}__{op}": key}
+        )
+
+    def _key(self, row, name):
+        if isinstance(row, dict):
+            return row["id" if name == "pk" else name]
+        return getattr(row, name)
+
+    def encode(self, direction, row):
+        value = self._key(row, self.field)
+        payload = {"d": direction, "f": self.field, "k": self._key(row, self.tiebreaker)}
+        if isinstance(value, datetime):
+            payload["t"] = value.isoformat()
+        else:
+            payload["v"] = value
+        raw = json.dumps(payload, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def _model(self):
+        return self.queryset.model
+
+    def _to_python(self, value):
+        try:
+            field = self._model()._meta.get_field(self.field)
+        except FieldDoesNotExist:
+            return value
+        return field.to_python(value)
+
+    def decode(self, cursor):
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            payload = json.loads(raw)
+            direction = payload["d"]
+            value = datetime.fromisoformat(payload["t"]) if "t" in payload else payload["v"]
+            # Checked here so a forged cursor can't reach the query with the wrong types
+            value = self._to_python(value)
+            key = int(payload["k"])
+        except (ValueError, TypeError, KeyError, OverflowError, ValidationError):
+            raise InvalidCursor(cursor)
+        if abs(key) > MAX_KEY or (isinstance(value, int) and abs(value) > MAX_KEY):
+            raise InvalidCursor(cursor)
+        # A cursor only fits the ordering it was issued for
+        if direction not in ("n", "p") or payload.get("f", self.field) != self.field:
+            raise InvalidCursor(cursor)
+        return direction, (value, key)
+
+
+class MergedKeysetPaginator(KeysetPaginator):
+    """
+    Keyset pagination over the union of several querysets sharing the
+    (field, tiebreaker) key, e.g. a materialized feed plus live queries.
+    Each source is range-scanned for page_size + 1 rows past the cursor
+    and the results are merged, so the union never has to be built in SQL.
+    Rows with the same tiebreaker value are returned once.
+    """
+
+    def __init__(self, querysets, page_size=None, **kwargs):
+        super().__init__(None, page_size, **kwargs)
+        self.querysets = querysets
+
+    def _model(self):
+        return self.querysets[0].model
+
+    def fetch(self, position, backwards):
+        rows = {}
+        for queryset in self.querysets:
+            for row in self._scan(queryset, position, backwards):
+                rows.setdefault(self._key(row, self.tiebreaker), row)
+        return sorted(
+            rows.values(),
+            key=lambda row: (self._key(row, self.field), self._key(row, self.tiebreaker)),
+            reverse=self.descending != backwards,
+        )[: self.page_size + 1]
+
+
+def paginate_request(request, queryset, **kwargs):
+    """
+    Paginates a queryset using the ?cursor= and ?page_size= parameters of
+    an HTML request. Malformed cursors are treated as a missing page.
+    """
+    paginator = KeysetPaginator(queryset, page_size=get_page_size(request), **kwargs)
+    try:
+        return paginator.page(request.GET.get("cursor"))
+    except InvalidCursor:
+        raise Http404("Invalid cursor")
@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.db import transaction
+
+from .models import Rating
+
+VALUES = range(1, 6)
+HISTOGRAM_FIELDS = tuple(f"rating_{value}" for value in VALUES)
+# Post columns a rating summary is computed from, for only()/values()
+SUMMARY_FIELDS = ("rating_sum", "rating_count", *HISTOGRAM_FIELDS)
+
+
+def prior():
+    """
+    (mean, weight) of the Bayesian prior: every post starts as if it had
+    ``weight`` ratings of ``mean`` stars, so a single 5-star rating can't
+    outrank a post with hundreds of 4-star ones.
+    """
+    return (
+        getattr(settings, "BLOG_RATING_PRIOR_MEAN", 3.0),
+        getattr(settings, "BLOG_RATING_PRIOR_WEIGHT", 5),
+    )
+
+
+def mean(total, count):
+    return total / count if count else None
+
+
+def bayesian_score(total, count):
+    prior_mean, prior_weight = prior()
+    if not count and not prior_weight:
+        return None
+    return (prior_mean * prior_weight + total) / (prior_weight + count)
+
+
+def summary(row):
+    """
+    The rating summary for a post, from its counter columns alone: a Post
+    instance or a values() dict with SUMMARY_FIELDS.
+    """
+    get = row.get if isinstance(row, dict) else lambda field: getattr(row, field)
+    total, count = get("rating_sum"), get("rating_count")
+    average, score = mean(total, count), bayesian_score(total, count)
+    return {
+        "count": count,
+        "mean": round(average, 2) if average is not None else None,
+        "score": round(score, 3) if score is not None else None,
+        "histogram": {str(value): get(field) for value, field in zip(VALUES, HISTOGRAM_FIELDS)},
+    }
+
+
+def rate(user, post_id, value):
+    """
+    Creates or changes ``user``'s rating of a post. The Rating signals move
+    the post's counters and histogram by the difference; re-submitting the
+    same value writes nothing. Returns (rating, created).
+    """
+    if value not in VALUES:
+        raise ValueError(f"Ratings are 1-{VALUES[-1]} stars")
+    with transaction.atomic():
+        rating, created = Rating.objects.get_or_create(post_id=post_id, user=user, defaults={"value": value})
+        if not created and rating.value != value:
+            rating.value = value
+            rating.save(update_fields=["value", "updated_at"])
+    return rating, created
@@ -0,0 +1,204 @@
+import asyncio
+import json
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .models import Notification
+
+# Queued in place of events a slow subscriber had no room for
+OVERFLOW = object()
+
+EVENT_FIELDS = ("id", "kind", "post_id", "actor_count", "message", "url", "created_at")
+
+_broker = None
+
+
+def heartbeat_interval():
+    return getattr(settings, "BLOG_SSE_HEARTBEAT", 15.0)
+
+
+def queue_size():
+    return getattr(settings, "BLOG_SSE_QUEUE_SIZE", 100)
+
+
+# -------------------------
+# Brokers
+# -------------------------
+class Subscription:
+    """
+    One connected stream's inbox: a bounded queue owned by the event loop
+    that created it. Producers never block on it; when it is full the
+    pending events are replaced by a single OVERFLOW marker and the stream
+    catches up from the database instead.
+    """
+
+    def __init__(self, user_id, maxsize):
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+
+    def offer(self, event):
+        """Runs on the subscriber's loop."""
+        if self.queue.full():
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(OVERFLOW)
+        else:
+            self.queue.put_nowait(event)
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class BaseBroker:
+    """
+    Per-user pub/sub for notification events. publish() may be called from
+    any thread; subscribe() and unsubscribe() from the subscriber's event
+    loop.
+    """
+
+    def publish(self, user_id, event):
+        raise NotImplementedError
+
+    def subscribe(self, user_id):
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription):
+        raise NotImplementedError
+
+    def subscriber_count(self):
+        return 0
+
+
+class LocalBroker(BaseBroker):
+    """
+    In-process broker. Only reaches streams served by the same process, so
+    multi-process deployments should plug in a shared one through
+    BLOG_REALTIME_BROKER; streams still catch up from the database on
+    reconnect.
+    """
+
+    def __init__(self):
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, user_id, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, event)
+            except RuntimeError:
+                pass  # loop already closed; the stream is going away
+
+    def subscribe(self, user_id):
+        subscription = Subscription(user_id, queue_size())
+        with self._lock:
+            self._subscriptions[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.user_id]
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subscriptions) for subscriptions in self._subscriptions.values())
+
+
+def get_broker():
+    """The broker named by BLOG_REALTIME_BROKER (dotted path), LocalBroker by default."""
+    global _broker
+    if _broker is None:
+        path = getattr(settings, "BLOG_REALTIME_BROKER", None)
+        _broker = import_string(path)() if path else LocalBroker()
+    return _broker
+
+
+# -------------------------
+# Publishing
+# -------------------------
+def event_from(notification):
+    return {field: getattr(notification, field) for field in EVENT_FIELDS}
+
+
+def publish(notifications):
+    """Pushes new Notification rows to their recipients' streams once the transaction commits."""
+    events = [(notification.user_id, event_from(notification)) for notification in notifications]
+
+    def send():
+        broker = get_broker()
+        for user_id, event in events:
+            broker.publish(user_id, event)
+
+    transaction.on_commit(send)
+
+
+# -------------------------
+# Streaming
+# -------------------------
+def format_event(event):
+    data = json.dumps(event, cls=DjangoJSONEncoder, separators=(",", ":"))
+    return f"id: {event['id']}\nevent: notification\ndata: {data}\n\n"
+
+
+async def latest_id(user_id):
+    return await (
+        Notification.objects.filter(user_id=user_id).order_by("-id").values_list("id", flat=True).afirst()
+    ) or 0
+
+
+async def missed(user_id, after_id, batch_size=100):
+    """The user's notifications with ids above ``after_id``, oldest first, read in batches."""
+    while True:
+        rows = [
+            row async for row in Notification.objects.filter(user_id=user_id, id__gt=after_id)
+            .order_by("id").values(*EVENT_FIELDS)[:batch_size]
+        ]
+        for row in rows:
+            yield row
+        if len(rows) < batch_size:
+            return
+        after_id = rows[-1]["id"]
+
+
+async def stream(user_id, last_id):
+    """
+    Server-Sent Events for one connection: everything after ``last_id``
+    from the database, then live events from the broker, with a comment
+    line every BLOG_SSE_HEARTBEAT idle seconds to keep proxies from
+    closing the connection. Subscribing happens before the catch-up, and
+    events the client already has are skipped by id, so nothing is lost
+    or repeated in between.
+    """
+    broker = get_broker()
+    subscription = broker.subscribe(user_id)
+    try:
+        yield f"retry: {int(heartbeat_interval() * 1000)}\n\n"
+        async for event in missed(user_id, last_id):
+            yield format_event(event)
+            last_id = event["id"]
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.get(), heartbeat_interval())
+            except asyncio.TimeoutError:
+                yield ": heartbeat\n\n"
+                continue
+            if event is OVERFLOW:
+                async for row in missed(user_id, last_id):
+                    yield format_event(row)
+                    last_id = row["id"]
+            elif event["id"] > last_id:
+                yield format_event(event)
+                last_id = event["id"]
+    finally:
+        broker.unsubscribe(subscription)
@@ -0,0 +1,280 @@
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from . import caching
+from .buffering import WriteBehindBuffer
+from .models import Post, RelatedPost
+
+# Similarity = weighted sum of TF-IDF cosine, tag Jaccard and same category.
+TEXT_WEIGHT = 0.6
+TAG_WEIGHT = 0.3
+CATEGORY_WEIGHT = 0.1
+
+TERMS_PER_DOC = 32     # strongest TF-IDF terms kept per post
+CANDIDATE_LIMIT = 500  # neighbours considered per tag/category on incremental updates
+MAX_DF_RATIO = 0.2     # terms in more than this share of posts don't generate candidates
+
+STOPWORDS = frozenset(
+    "about after all also and any are because been but can could did does for from had has have her "
+    "his how into its just more most not now only our out over she should some such than that the "
+    "their them then there these they this those through too under very was were what when where "
+    "which while who why will with would you your".split()
+)
+
+_buffer = None
+
+
+def top_k():
+    return getattr(settings, "BLOG_RELATED_POSTS", 5)
+
+
+def tokenize(text):
+    return [t for t in re.findall(r"[a-z0-9]+", text.lower()) if len(t) > 2 and t not in STOPWORDS]
+
+
+# -------------------------
+# Documents
+# -------------------------
+class Document:
+    __slots__ = ("id", "category_id", "tags", "counts", "vector")
+
+    def __init__(self, pk, category_id, title, content, tags):
+        self.id = pk
+        self.category_id = category_id
+        self.tags = tags
+        # Title terms count double
+        self.counts = Counter(tokenize(content))
+        self.counts.update(tokenize(title) * 2)
+        self.vector = {}
+
+    def weigh(self, idf):
+        """Builds the L2-normalized TF-IDF vector, keeping the top terms only."""
+        weights = {term: (1 + math.log(n)) * idf.get(term, 1.0) for term, n in self.counts.items()}
+        top = heapq.nlargest(TERMS_PER_DOC, weights.items(), key=lambda item: item[1])
+        norm = math.sqrt(sum(w * w for _term, w in top)) or 1.0
+        self.vector = {term: w / norm for term, w in top}
+        self.counts = None
+
+
+DOCUMENT_FIELDS = ("id", "category_id", "title", "content")
+
+
+def _documents(rows):
+    tags = defaultdict(set)
+    for post_id, tag_id in Post.tags.through.objects.filter(
+        post_id__in=[row[0] for row in rows]
+    ).values_list("post_id", "tag_id"):
+        tags[post_id].add(tag_id)
+    return [Document(pk, category_id, title, content, frozenset(tags[pk])) for pk, category_id, title, content in rows]
+
+
+def load_documents(queryset):
+    return _documents(list(queryset.values_list(*DOCUMENT_FIELDS)))
+
+
+def iter_documents(queryset, batch_size=1000):
+    """
+    Documents for ``queryset`` in its order, streamed ``batch_size`` rows at
+    a time with tags looked up once per batch, so post content is never
+    all in memory at once.
+    """
+    rows = queryset.values_list(*DOCUMENT_FIELDS).iterator(chunk_size=batch_size)
+    while True:
+        chunk = list(islice(rows, batch_size))
+        if not chunk:
+            return
+        yield from _documents(chunk)
+
+
+def idf_from(df, total):
+    return {term: math.log((total + 1) / (n + 1)) + 1 for term, n in df.items()}
+
+
+def inverse_document_frequency(documents):
+    df = Counter()
+    for doc in documents:
+        df.update(doc.counts.keys())
+    return idf_from(df, len(documents))
+
+
+def similarity(a, b):
+    if len(a.vector) > len(b.vector):
+        a, b = b, a
+    text = sum(w * b.vector.get(term, 0.0) for term, w in a.vector.items())
+    union = len(a.tags | b.tags)
+    tags = len(a.tags & b.tags) / union if union else 0.0
+    category = 1.0 if a.category_id is not None and a.category_id == b.category_id else 0.0
+    return TEXT_WEIGHT * text + TAG_WEIGHT * tags + CATEGORY_WEIGHT * category
+
+
+# -------------------------
+# Storage
+# -------------------------
+def save_neighbours(neighbours):
+    """Replaces the stored lists for {post_id: [(score, related_id), ...]}."""
+    rows = [
+        RelatedPost(post_id=post_id, related_id=related_id, rank=rank, score=score)
+        for post_id, ranked in neighbours.items()
+        for rank, (score, related_id) in enumerate(ranked)
+    ]
+    with transaction.atomic():
+        RelatedPost.objects.filter(post_id__in=list(neighbours)).delete()
+        RelatedPost.objects.bulk_create(rows, batch_size=1000)
+        # post_detail payloads carry the list
+        caching.bump(*(caching.post_namespace(post_id) for post_id in neighbours))
+
+
+# -------------------------
+# Full rebuild
+# -------------------------
+def rebuild(k=None, batch_size=1000, stdout=None):
+    """
+    Recomputes the related-posts table for every live post. Candidates for
+    each post come from inverted indexes on its strongest terms and its
+    tags, so only posts that can score above the category baseline are
+    compared; same-category posts fill any remaining slots. Posts are read
+    twice in id-ordered batches, once for document frequencies and once to
+    build the vectors, so only the top TERMS_PER_DOC weights of each post
+    are held in memory. Returns the number of posts processed.
+    """
+    k = k or top_k()
+    posts = Post.objects.live().order_by("-id")
+    df, total = Counter(), 0
+    for doc in iter_documents(posts, batch_size):
+        df.update(doc.counts.keys())
+        total += 1
+    idf = idf_from(df, total)
+    del df
+
+    documents = []
+    by_id, by_term, by_tag, by_category = {}, defaultdict(list), defaultdict(list), defaultdict(list)
+    for doc in iter_documents(posts, batch_size):
+        doc.weigh(idf)
+        documents.append(doc)
+        by_id[doc.id] = doc
+        for term in doc.vector:
+            by_term[term].append(doc.id)
+        for tag in doc.tags:
+            by_tag[tag].append(doc.id)
+        if doc.category_id is not None:
+            by_category[doc.category_id].append(doc.id)
+
+    max_df = max(2, int(len(documents) * MAX_DF_RATIO))
+    pending, done = {}, 0
+    for doc in documents:
+        candidates = set()
+        for term in doc.vector:
+            if len(by_term[term]) <= max_df:
+                candidates.update(by_term[term])
+        for tag in doc.tags:
+            candidates.update(by_tag[tag][:CANDIDATE_LIMIT])
+        candidates.discard(doc.id)
+        ranked = heapq.nlargest(k, ((similarity(doc, by_id[pk]), pk) for pk in candidates))
+        if len(ranked) < k and doc.category_id is not None:
+            for pk in by_category[doc.category_id]:
+                if len(ranked) >= k:
+                    break
+                if pk != doc.id and pk not in candidates:
+                    ranked.append((CATEGORY_WEIGHT, pk))
+        pending[doc.id] = ranked
+        if len(pending) >= batch_size:
+            save_neighbours(pending)
+            done += len(pending)
+            pending = {}
+            if stdout is not None:
+                stdout.write(f"Computed related posts for {done} posts")
+    if pending:
+        save_neighbours(pending)
+        done += len(pending)
+    RelatedPost.objects.exclude(post_id__in=Post.objects.live().values("id")).delete()
+    return done
+
+
+# -------------------------
+# Incremental updates
+# -------------------------
+def score_peers(post_id):
+    """
+    {peer_id: similarity} for a live post against up to CANDIDATE_LIMIT of
+    its newest tag and category peers, with IDF estimated over that set.
+    """
+    post = Post.objects.only("id", "category_id").get(pk=post_id)
+    tag_ids = list(Post.tags.through.objects.filter(post_id=post_id).values_list("tag_id", flat=True))
+    peer_filter = Q(pk__in=[])
+    if post.category_id is not None:
+        peer_filter |= Q(category_id=post.category_id)
+    if tag_ids:
+        peer_filter |= Q(tags__in=tag_ids)
+    peers = (
+        Post.objects.live()
+        .filter(peer_filter)
+        .exclude(id=post_id)
+        .order_by("-id")
+        .values_list("id", flat=True)
+        .distinct()[:CANDIDATE_LIMIT]
+    )
+    documents = load_documents(Post.objects.filter(id__in=[post_id, *peers]))
+    idf = inverse_document_frequency(documents)
+    for doc in documents:
+        doc.weigh(idf)
+    target = next(doc for doc in documents if doc.id == post_id)
+    return {doc.id: similarity(target, doc) for doc in documents if doc.id != post_id}
+
+
+def update_posts(post_ids, k=None):
+    """
+    Recomputes the neighbours of the given posts against their tag and
+    category peers, and splices each post into its peers' lists where it
+    now ranks in their top K. Posts that listed it before get its new
+    score, or, if it is no longer among their peers, a fresh list of their
+    own. IDF is estimated over the local candidate set;
+    rebuild_related_posts corrects any drift.
+    """
+    k = k or top_k()
+    live = set(Post.objects.live().filter(id__in=post_ids).values_list("id", flat=True))
+    gone = set(post_ids) - live
+    if gone:
+        stale = RelatedPost.objects.filter(Q(post_id__in=gone) | Q(related_id__in=gone))
+        caching.bump(*(caching.post_namespace(pk) for pk in set(stale.values_list("post_id", flat=True))))
+        stale.delete()
+
+    for post_id in live:
+        scores = score_peers(post_id)
+        neighbours = {post_id: heapq.nlargest(k, ((score, pk) for pk, score in scores.items()))}
+        listed_by = set(RelatedPost.objects.filter(related_id=post_id).values_list("post_id", flat=True))
+        current = defaultdict(list)
+        for owner, related_id, score in RelatedPost.objects.filter(post_id__in=list(scores)).values_list(
+            "post_id", "related_id", "score"
+        ):
+            if related_id != post_id:
+                current[owner].append((score, related_id))
+        for peer_id, score in scores.items():
+            ranked = current[peer_id]
+            if peer_id in listed_by or len(ranked) < k or score > min(ranked)[0]:
+                neighbours[peer_id] = heapq.nlargest(k, ranked + [(score, post_id)])
+        for owner in listed_by - scores.keys() - {post_id}:
+            neighbours[owner] = heapq.nlargest(k, ((score, pk) for pk, score in score_peers(owner).items()))
+        save_neighbours(neighbours)
+
+
+def get_buffer():
+    global _buffer
+    if _buffer is None:
+        _buffer = WriteBehindBuffer(
+            lambda items: update_posts([post_id for post_id, _flag in items]),
+            interval=getattr(settings, "BLOG_RELATED_FLUSH_INTERVAL", 10.0),
+            merge=lambda old, new: old,
+        )
+    return _buffer
+
+
+def mark_dirty(post_id):
+    """Schedules a post's neighbours for recomputation after commit."""
+    transaction.on_commit(lambda: get_buffer().add(post_id, True))
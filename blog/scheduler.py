@@ -0,0 +1,34 @@
+from django.db import transaction
+from django.utils import timezone
+
+from . import caching, feeds, search
+from .models import Post
+
+
+def publish_due(batch_size=500, now=None, stdout=None):
+    """
+    Publishes every scheduled post whose publish_date has passed, in
+    batches of ``batch_size``. Each batch is one indexed range scan on
+    (status, publish_date) plus one UPDATE; the published posts are then
+    added to the search index, cached feeds are invalidated and the posts
+    are fanned out to followers. Returns the number of posts published.
+    """
+    now = now or timezone.now()
+    due = Post.objects.filter(status="scheduled", publish_date__lte=now)
+    published = 0
+    while True:
+        ids = list(due.order_by("publish_date").values_list("id", flat=True)[:batch_size])
+        if not ids:
+            break
+        with transaction.atomic():
+            count = Post.objects.filter(id__in=ids, status="scheduled").update(
+                status="published", updated_at=now
+            )
+            search.get_backend().index_posts(Post.objects.filter(id__in=ids))
+        caching.bump(caching.FEED, *(caching.post_namespace(pk) for pk in ids))
+        for pk in ids:
+            feeds.mark_dirty(pk)
+        published += count
+        if stdout is not None:
+            stdout.write(f"Published {published} scheduled posts")
+    return published
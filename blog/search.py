@@ -0,0 +1,212 @@
+import base64
+import json
+import re
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils.html import escape
+from django.utils.module_loading import import_string
+from django.utils.safestring import mark_safe
+
+from .models import Post
+from .pagination import CursorPage, InvalidCursor, KeysetPaginator
+
+FTS_TABLE = "blog_post_search"
+
+# Snippet highlight markers; swapped for <mark> after the text is escaped.
+_HL_START, _HL_END = "\x02", "\x03"
+
+
+def terms(query):
+    return re.findall(r"\w+", query.lower())
+
+
+def format_snippet(raw):
+    text = escape(raw)
+    return mark_safe(text.replace(_HL_START, "<mark>").replace(_HL_END, "</mark>"))
+
+
+# -------------------------
+# Backends
+# -------------------------
+class BaseSearchBackend:
+    """
+    Interface for post search. index_posts/remove_posts are called from the
+    Post signals; search() returns a CursorPage of Post objects, each with
+    a ``search_snippet`` attribute (or None).
+    """
+
+    def index_posts(self, posts):
+        pass
+
+    def index_rows(self, rows):
+        """Indexes (id, title, content) rows of live posts."""
+        self.index_posts(Post(id=pk, title=title, content=content) for pk, title, content in rows)
+
+    def remove_posts(self, post_ids):
+        pass
+
+    def clear(self):
+        pass
+
+    def search(self, query, cursor=None, page_size=None):
+        raise NotImplementedError
+
+
+class DatabaseSearchBackend(BaseSearchBackend):
+    """
+    Fallback for databases without a full-text index: substring scan over
+    title and content, newest first.
+    """
+
+    def search(self, query, cursor=None, page_size=None):
+        posts = Post.objects.feed().live()
+        for term in terms(query):
+            posts = posts.filter(Q(title__icontains=term) | Q(content__icontains=term))
+        page = KeysetPaginator(posts, page_size=page_size).page(cursor)
+        for post in page.object_list:
+            post.search_snippet = None
+        return page
+
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    """
+    SQLite FTS5 index keyed by post id (rowid). Results are ordered by
+    bm25 rank with title matches weighted higher (configured in the
+    migration), every term is prefix-matched, and pages are seeked on
+    (rank, rowid).
+    """
+
+    def index_posts(self, posts):
+        posts = list(posts)
+        if not posts:
+            return
+        self.remove_posts([post.pk for post in posts])
+        self.index_rows([(post.pk, post.title, post.content) for post in posts if post.is_live()])
+
+    def index_rows(self, rows):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE}(rowid, title, content) VALUES (%s, %s, %s)", rows
+            )
+
+    def remove_posts(self, post_ids):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [(pk,) for pk in post_ids]
+            )
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+
+    def search(self, query, cursor=None, page_size=None):
+        page_size = page_size or getattr(settings, "BLOG_PAGE_SIZE", 20)
+        words = terms(query)
+        if not words:
+            return CursorPage([])
+        match = " ".join(f'"{word}"*' for word in words)
+
+        sql = (
+            f"SELECT rowid, rank, snippet({FTS_TABLE}, -1, %s, %s, '…', 24) "
+            f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s"
+        )
+        params = [_HL_START, _HL_END, match]
+        if cursor:
+            rank, key = self.decode(cursor)
+            sql += " AND (rank > %s OR (rank = %s AND rowid > %s))"
+            params += [rank, rank, key]
+        sql += " ORDER BY rank, rowid LIMIT %s"
+        params.append(page_size + 1)
+
+        with connection.cursor() as db:
+            db.execute(sql, params)
+            hits = db.fetchall()
+
+        next_cursor = None
+        if len(hits) > page_size:
+            hits = hits[:page_size]
+            next_cursor = self.encode(hits[-1][1], hits[-1][0])
+
+        posts = Post.objects.feed().live().in_bulk([hit[0] for hit in hits])
+        results = []
+        for pk, _rank, snippet in hits:
+            post = posts.get(pk)
+            if post is not None:
+                post.search_snippet = format_snippet(snippet)
+                results.append(post)
+        return CursorPage(results, next_cursor=next_cursor)
+
+    def encode(self, rank, key):
+        raw = json.dumps({"r": rank, "k": key}, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def decode(self, cursor):
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            payload = json.loads(raw)
+            return float(payload["r"]), int(payload["k"])
+        except (ValueError, TypeError, KeyError):
+            raise InvalidCursor(cursor)
+
+
+_backend = None
+
+
+def get_backend():
+    """
+    Returns the configured search backend. BLOG_SEARCH_BACKEND may name a
+    BaseSearchBackend subclass by dotted path; by default SQLite databases
+    use the FTS5 index and anything else falls back to a substring scan.
+    """
+    global _backend
+    if _backend is None:
+        path = getattr(settings, "BLOG_SEARCH_BACKEND", None)
+        if path:
+            _backend = import_string(path)()
+        elif connection.vendor == "sqlite":
+            _backend = SQLiteFTSBackend()
+        else:
+            _backend = DatabaseSearchBackend()
+    return _backend
+
+
+def search_posts(query, cursor=None, page_size=None):
+    return get_backend().search(query, cursor=cursor, page_size=page_size)
+
+
+# -------------------------
+# Index maintenance
+# -------------------------
+def index_post(post):
+    get_backend().index_posts([post])
+
+
+def remove_post(post_id):
+    get_backend().remove_posts([post_id])
+
+
+def rebuild_index(batch_size=1000, stdout=None):
+    """
+    Drops every indexed document and re-indexes live posts in id order,
+    one transaction per batch. Returns the number of posts indexed.
+    """
+    backend = get_backend()
+    backend.clear()
+    last_id, total = 0, 0
+    while True:
+        batch = list(
+            Post.objects.live().filter(id__gt=last_id)
+            .order_by("id")
+            .values_list("id", "title", "content")[:batch_size]
+        )
+        if not batch:
+            break
+        with transaction.atomic():
+            backend.index_rows(batch)
+        last_id = batch[-1][0]
+        total += len(batch)
+        if stdout is not None:
+            stdout.write(f"Indexed {total} posts (last id {last_id})")
+    return total
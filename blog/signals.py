@@ -1,7 +1,20 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
 from django.dispatch import receiver
 from django.contrib.auth.models import User
-from .models import Profile, Comment, Like, Notification
+from .models import Profile, Post, Category, Tag, Comment, Like, Bookmark, Rating, Notification
+from . import caching, counters, feeds, notifications, realtime, related, search, trending
+
+TRENDING_KINDS = {
+    Like: "like",
+    Comment: "comment",
+    Rating: "rating",
+}
+
+COUNTER_FIELDS = {
+    Like: "like_count",
+    Comment: "comment_count",
+    Bookmark: "bookmark_count",
+}
 
 
 # -------------------------
@@ -27,15 +40,12 @@ def create_or_save_user_profile(sender, instance, created, **kwargs):
 @receiver(post_save, sender=Comment)
 def notify_post_author_on_comment(sender, instance, created, **kwargs):
     """
-    Creates a Notification for the post author when someone comments.
-    Does not notify if the author commented on their own post.
+    Queues a comment notification for the post author. Events are
+    coalesced and written in bulk by blog.notifications after commit;
+    authors commenting on their own post are skipped there.
     """
-    if created and instance.post.author != instance.user:
-        Notification.objects.create(
-            user=instance.post.author,
-            message=f"{instance.user.username} commented on your post '{instance.post.title}'",
-            url=f"/post/{instance.post.id}/"
-        )
+    if created and not kwargs.get("raw"):
+        notifications.notify("comment", instance.post_id, instance.user_id)
 
 
 # -------------------------
@@ -44,12 +54,197 @@ def notify_post_author_on_comment(sender, instance, created, **kwargs):
 @receiver(post_save, sender=Like)
 def notify_post_author_on_like(sender, instance, created, **kwargs):
     """
-    Creates a Notification for the post author when someone likes their post.
-    Does not notify if the author liked their own post.
+    Queues a like notification for the post author, coalesced with other
+    likes on the same post ("12 people liked your post").
+    """
+    if created and not kwargs.get("raw"):
+        notifications.notify("like", instance.post_id, instance.user_id)
+
+
+# -------------------------
+# Keep unread counters in step when posts are deleted
+# -------------------------
+@receiver(pre_delete, sender=Post)
+def discard_post_notifications(sender, instance, **kwargs):
+    """The post's notifications are cascade-deleted with it; keep unread counters in step."""
+    notifications.discard_post(instance.pk)
+
+
+# -------------------------
+# Keep the full-text search index in sync with posts
+# -------------------------
+@receiver(post_save, sender=Post)
+def index_post_for_search(sender, instance, **kwargs):
+    """
+    Re-indexes a post after every save. Posts that aren't live (unapproved
+    or still scheduled) are dropped from the index so they never show up
+    in search results.
+    """
+    if kwargs.get("raw"):
+        return
+    search.index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def remove_post_from_search(sender, instance, **kwargs):
+    search.remove_post(instance.pk)
+
+
+
+# -------------------------
+# Maintain denormalized engagement counters on Post
+# -------------------------
+@receiver(post_save, sender=Like)
+@receiver(post_save, sender=Comment)
+@receiver(post_save, sender=Bookmark)
+def increment_post_counter(sender, instance, created, **kwargs):
+    """
+    Bumps like_count / comment_count / bookmark_count when a row is added.
+    """
+    if created and not kwargs.get("raw"):
+        counters.adjust(instance.post_id, **{COUNTER_FIELDS[sender]: 1})
+
+
+@receiver(post_delete, sender=Like)
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=Bookmark)
+def decrement_post_counter(sender, instance, **kwargs):
+    if not counters.is_post_cascade(kwargs.get("origin")):
+        counters.adjust(instance.post_id, **{COUNTER_FIELDS[sender]: -1})
+
+
+@receiver(post_save, sender=Rating)
+def update_post_rating_totals(sender, instance, created, **kwargs):
+    """
+    Keeps rating_sum / rating_count and the rating_1..rating_5 histogram in
+    step with the Rating rows. Changing an existing rating only applies the
+    difference to rating_sum and moves one count between buckets.
+    """
+    if kwargs.get("raw"):
+        return
+    if created:
+        counters.adjust(instance.post_id, rating_sum=instance.value, rating_count=1,
+                        **{f"rating_{instance.value}": 1})
+    else:
+        previous = getattr(instance, "_loaded_value", instance.value)
+        if previous != instance.value:
+            counters.adjust(instance.post_id, rating_sum=instance.value - previous,
+                            **{f"rating_{previous}": -1, f"rating_{instance.value}": 1})
+    instance._loaded_value = instance.value
+
+
+@receiver(post_delete, sender=Rating)
+def remove_post_rating(sender, instance, **kwargs):
+    if not counters.is_post_cascade(kwargs.get("origin")):
+        value = getattr(instance, "_loaded_value", instance.value)
+        counters.adjust(instance.post_id, rating_sum=-value, rating_count=-1, **{f"rating_{value}": -1})
+
+
+
+# -------------------------
+# Invalidate cached feeds and post detail payloads
+# -------------------------
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_caches(sender, instance, **kwargs):
+    caching.bump(caching.FEED, caching.post_namespace(instance.pk))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=Rating)
+@receiver(post_delete, sender=Rating)
+def invalidate_comment_caches(sender, instance, **kwargs):
+    """
+    Comments and rating summaries appear in the post detail payload, the
+    API representation and the feed. Rows removed along with their post
+    are covered by the post's own invalidation.
+    """
+    if not counters.is_post_cascade(kwargs.get("origin")):
+        caching.bump(caching.FEED, caching.post_namespace(instance.post_id))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_taxonomy_caches(sender, instance, **kwargs):
+    caching.bump(caching.FEED, caching.TAXONOMY)
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def invalidate_post_tag_caches(sender, instance, action, reverse, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if reverse:
+        caching.bump(caching.FEED)
+    else:
+        caching.bump(caching.FEED, caching.post_namespace(instance.pk))
+
+
+
+# -------------------------
+# Refresh precomputed related posts
+# -------------------------
+@receiver(post_save, sender=Post)
+def refresh_related_posts(sender, instance, **kwargs):
+    if not kwargs.get("raw"):
+        related.mark_dirty(instance.pk)
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def refresh_related_posts_on_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Tag changes alter similarity; recompute the affected posts' neighbours
+    once the transaction commits (batched by the write-behind buffer).
     """
-    if created and instance.post.author != instance.user:
-        Notification.objects.create(
-            user=instance.post.author,
-            message=f"{instance.user.username} liked your post '{instance.post.title}'",
-            url=f"/post/{instance.post.id}/"
-        )
\ No newline at end of file
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        related.mark_dirty(instance.pk)
+    else:
+        for post_id in pk_set or ():
+            related.mark_dirty(post_id)
+
+
+# -------------------------
+# Fan posts out to followers' feeds
+# -------------------------
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance, **kwargs):
+    if not kwargs.get("raw") and instance.is_live():
+        feeds.mark_dirty(instance.pk)
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def fan_out_post_on_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    """Newly added tags reach their followers; fan-out skips items that already exist."""
+    if action != "post_add":
+        return
+    for post_id in (pk_set or ()) if reverse else (instance.pk,):
+        feeds.mark_dirty(post_id)
+
+
+# -------------------------
+# Feed engagement into trending scores
+# -------------------------
+@receiver(post_save, sender=Like)
+@receiver(post_save, sender=Comment)
+@receiver(post_save, sender=Rating)
+def credit_trending_score(sender, instance, created, **kwargs):
+    if created and not kwargs.get("raw"):
+        trending.record(instance.post_id, TRENDING_KINDS[sender])
+
+
+# -------------------------
+# Push new notifications to connected streams
+# -------------------------
+@receiver(notifications.delivered)
+def push_delivered_notifications(sender, instances, **kwargs):
+    realtime.publish(instances)
+
+
+@receiver(post_save, sender=Notification)
+def push_notification(sender, instance, created, **kwargs):
+    if created and not kwargs.get("raw"):
+        realtime.publish([instance])
@@ -0,0 +1,60 @@
+from contextlib import contextmanager
+
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+
+from . import caching, feeds, notifications, related, trending, viewcount
+
+# Maximum queries per view on a cold cache, for an authenticated request.
+# Tighten these when a view gets cheaper; a view exceeding its budget is a
+# regression (usually an N+1 in a template). Enforced by blog.tests and the
+# check_query_budgets command.
+QUERY_BUDGETS = {
+    "home": 5,
+    "posts_by_category": 7,  # + follow state
+    "posts_by_tag": 7,
+    "search_posts": 6,
+    "post_detail": 5,  # validators, post, related (index, then category fallback), comments
+    "profile": 7,
+    "my_notifications": 4,
+    "trending": 5,
+    "following_feed": 7,  # pull sources, feed keys, posts, tags
+}
+
+
+@contextmanager
+def assert_max_queries(limit, using="default"):
+    """
+    Fails if the block runs more than ``limit`` queries, listing the SQL
+    that was executed.
+    """
+    with CaptureQueriesContext(connections[using]) as context:
+        yield context
+    if len(context) > limit:
+        statements = "\n".join(f"  {query['sql']}" for query in context.captured_queries)
+        raise AssertionError(f"{len(context)} queries executed, budget is {limit}:\n{statements}")
+
+
+def assert_view_query_budget(client, url, budget=None, cold=True):
+    """
+    Requests ``url`` with the test client and asserts it stays within the
+    QUERY_BUDGETS entry of the view it resolves to. With ``cold`` the blog
+    caches are cleared first so the real query plan is measured.
+    """
+    if budget is None:
+        budget = QUERY_BUDGETS[resolve(url.split("?")[0]).url_name]
+    if cold:
+        caching.get_cache().clear()
+    with assert_max_queries(budget):
+        response = client.get(url)
+    return response
+
+
+def flush_buffers():
+    """
+    Writes out every write-behind buffer now, e.g. before a test's
+    transaction is rolled back, so nothing is left to flush at exit.
+    """
+    for module in (notifications, viewcount, related, feeds, trending):
+        module.get_buffer().flush()
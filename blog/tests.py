@@ -0,0 +1,506 @@
+import base64
+import json
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import resolve, reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import caching, counters, export, feeds, importer, notifications, ratings, related, scheduler, threads
+from .models import Category, Comment, Like, Notification, Post, Profile, Tag
+from .pagination import InvalidCursor, KeysetPaginator
+from .testing import QUERY_BUDGETS, assert_view_query_budget, flush_buffers
+
+
+def make_post(author, **fields):
+    fields.setdefault("title", "A post")
+    fields.setdefault("content", "Some content")
+    fields.setdefault("status", "published")
+    return Post.objects.create(author=author, **fields)
+
+
+class BlogTestCase(TestCase):
+    def setUp(self):
+        # Write buffered updates inside the test transaction, not at exit
+        self.addCleanup(flush_buffers)
+
+
+class QueryBudgetTests(BlogTestCase):
+    """
+    Requests every budgeted view against seeded data, so a view that grows
+    past its QUERY_BUDGETS entry (usually an N+1 in a template) fails the
+    test run instead of waiting for check_query_budgets.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command("seed_data", users=20, posts=60, seed=7, stdout=StringIO())
+        cls.user = User.objects.order_by("id").first()
+        cls.post = Post.objects.live().order_by("id").first()
+        cls.category = Category.objects.filter(posts__isnull=False).first()
+        cls.tag = Tag.objects.filter(posts__isnull=False).first()
+        feeds.toggle(cls.user, "category", cls.category.pk)
+        feeds.toggle(cls.user, "tag", cls.tag.pk)
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+        # Prime the session (theme preference) so it isn't charged to the first view
+        self.client.get(reverse("home"))
+
+    def budgeted_urls(self):
+        return [
+            reverse("home"),
+            reverse("posts_by_category", args=[self.category.pk]),
+            reverse("posts_by_tag", args=[self.tag.pk]),
+            reverse("search_posts") + "?q=the",
+            reverse("post_detail", args=[self.post.pk]),
+            reverse("profile", args=[self.user.username]),
+            reverse("my_notifications"),
+            reverse("trending"),
+            reverse("following_feed"),
+        ]
+
+    def test_views_within_budget(self):
+        for url in self.budgeted_urls():
+            with self.subTest(url=url):
+                response = assert_view_query_budget(self.client, url)
+                self.assertEqual(response.status_code, 200)
+
+    def test_every_budget_is_checked(self):
+        checked = {resolve(url.split("?")[0]).url_name for url in self.budgeted_urls()}
+        self.assertEqual(checked, set(QUERY_BUDGETS))
+
+
+class CounterTests(BlogTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user("author")
+        cls.fans = [User.objects.create_user(f"fan{i}") for i in range(3)]
+
+    def test_likes_maintain_like_count(self):
+        post = make_post(self.author)
+        likes = [Like.objects.create(post=post, user=fan) for fan in self.fans]
+        likes[0].delete()
+        post.refresh_from_db()
+        self.assertEqual(post.like_count, 2)
+
+    def test_stale_save_keeps_concurrent_increments(self):
+        post = make_post(self.author)
+        stale = Post.objects.get(pk=post.pk)
+        counters.adjust(post.pk, like_count=5, views=3)
+        stale.title = "Edited"
+        stale.save()
+        post.refresh_from_db()
+        self.assertEqual((post.title, post.like_count, post.views), ("Edited", 5, 3))
+
+    def test_decrements_clamp_at_zero(self):
+        post = make_post(self.author)
+        counters.adjust(post.pk, like_count=-1)
+        post.refresh_from_db()
+        self.assertEqual(post.like_count, 0)
+
+    def test_reconcile_fixes_drift(self):
+        post = make_post(self.author)
+        Like.objects.create(post=post, user=self.fans[0])
+        Post.objects.filter(pk=post.pk).update(like_count=40, comment_count=7)
+        self.assertEqual(counters.reconcile(), 1)
+        post.refresh_from_db()
+        self.assertEqual((post.like_count, post.comment_count), (1, 0))
+        self.assertEqual(counters.reconcile(), 0)
+
+
+class CacheInvalidationTests(BlogTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user("author")
+
+    def test_bumps_wait_for_commit(self):
+        before = caching.get_version(caching.FEED)
+        with self.captureOnCommitCallbacks(execute=True):
+            make_post(self.author)
+            self.assertEqual(caching.get_version(caching.FEED), before)
+        self.assertNotEqual(caching.get_version(caching.FEED), before)
+
+    def test_cached_feed_shows_new_post_after_commit(self):
+        make_post(self.author, title="First")
+        self.assertContains(self.client.get(reverse("home")), "First")
+        with self.captureOnCommitCallbacks(execute=True):
+            make_post(self.author, title="Second")
+        self.assertContains(self.client.get(reverse("home")), "Second")
+
+
+class NotificationTests(BlogTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user("author")
+        cls.fans = [User.objects.create_user(f"fan{i}") for i in range(3)]
+
+    def unread(self):
+        return Profile.objects.get(user=self.author).unread_notifications
+
+    def test_deliver_coalesces_and_counts_unread(self):
+        post = make_post(self.author)
+        other = make_post(self.author, title="Other")
+        notifications.deliver([
+            (("like", post.pk), [fan.pk for fan in self.fans]),
+            (("comment", other.pk), [self.fans[0].pk, self.author.pk]),
+        ])
+        self.assertEqual(self.unread(), 2)
+        like = Notification.objects.get(kind="like")
+        self.assertEqual(like.actor_count, 3)
+        self.assertIn("3 people liked", like.message)
+
+    def test_own_actions_are_not_notified(self):
+        post = make_post(self.author)
+        self.assertEqual(notifications.deliver([(("like", post.pk), [self.author.pk])]), [])
+        self.assertEqual(self.unread(), 0)
+
+    def test_mark_read_decrements(self):
+        post = make_post(self.author)
+        notifications.deliver([(("like", post.pk), [self.fans[0].pk]), (("comment", post.pk), [self.fans[1].pk])])
+        self.assertEqual(notifications.mark_read(self.author), 2)
+        self.assertEqual(self.unread(), 0)
+
+    def test_deleting_post_discards_its_unread_notifications(self):
+        post = make_post(self.author)
+        other = make_post(self.author, title="Other")
+        notifications.deliver([(("like", post.pk), [self.fans[0].pk]), (("like", other.pk), [self.fans[1].pk])])
+        post.delete()
+        self.assertEqual(self.unread(), 1)
+        self.assertEqual(notifications.recount_unread(), Profile.objects.count())
+        self.assertEqual(self.unread(), 1)
+
+
+class ConditionalGetTests(BlogTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user("author")
+        cls.reader = User.objects.create_user("reader")
+
+    def setUp(self):
+        super().setUp()
+        self.post = make_post(self.author)
+        self.url = reverse("post_detail", args=[self.post.pk])
+
+    def revalidate(self, etag):
+        return self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code
+
+    def test_unchanged_post_is_not_modified(self):
+        response = self.client.get(self.url)
+        self.assertNotIn("Last-Modified", response)
+        self.assertEqual(self.revalidate(response["ETag"]), 304)
+
+    def test_rating_change_changes_etag(self):
+        etag = self.client.get(self.url)["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            ratings.rate(self.reader, self.post.pk, 4)
+        self.assertEqual(self.revalidate(etag), 200)
+
+    def test_comment_delete_changes_etag(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            comment = Comment.objects.create(post=self.post, user=self.reader, text="Hi")
+        etag = self.client.get(self.url)["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            comment.delete()
+        self.assertEqual(self.revalidate(etag), 200)
+
+    def test_if_modified_since_alone_is_ignored(self):
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE="Fri, 01 Jan 2100 00:00:00 GMT")
+        self.assertEqual(response.status_code, 200)
+
+    def test_api_detail_revalidates(self):
+        url = f"/api/posts/{self.post.pk}/"
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            ratings.rate(self.reader, self.post.pk, 2)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class ExportTests(BlogTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user("author")
+        cls.reader = User.objects.create_user("reader")
+
+    def export(self, kind, since=None, fmt="ndjson"):
+        return "".join(export.stream(kind, fmt, since))
+
+    def test_full_posts_export_has_counters_and_tags(self):
+        post = make_post(self.author)
+        post.tags.add(Tag.objects.create(name="Django", slug="django"))
+        row = json.loads(self.export("posts"))
+        self.assertEqual((row["id"], row["tags"], row["like_count"]), (post.pk, ["django"], 0))
+
+    def test_incremental_posts_export_leaves_out_counters(self):
+        since = timezone.now()
+        make_post(self.author)
+        row = json.loads(self.export("posts", since))
+        self.assertNotIn("like_count", row)
+        self.assertNotIn("views", row)
+        header = self.export("posts", since, fmt="csv").splitlines()[0]
+        self.assertNotIn("like_count", header)
+
+    def test_incremental_ratings_export_includes_changed_ratings(self):
+        post = make_post(self.author)
+        ratings.rate(self.reader, post.pk, 2)
+        since = timezone.now()
+        self.assertEqual(self.export("ratings", since), "")
+        ratings.rate(self.reader, post.pk, 5)
+        row = json.loads(self.export("ratings", since))
+        self.assertEqual(row["value"], 5)
+
+
+class ImportTests(BlogTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user("author")
+
+    def run_import(self, text, **kwargs):
+        post_importer = importer.PostImporter(batch_size=2)
+        consumed = post_importer.run(importer.read_ndjson(StringIO(text)), **kwargs)
+        return post_importer, consumed
+
+    def test_export_round_trip(self):
+        post = make_post(self.author, title="Round trip", category=Category.objects.create(name="Food", slug="food"))
+        post.tags.add(Tag.objects.create(name="Django", slug="django"))
+        lines = "".join(export.stream("posts", "ndjson"))
+        post.delete()
+        post_importer, consumed = self.run_import(lines)
+        self.assertEqual((post_importer.imported, consumed), (1, 1))
+        imported = Post.objects.get(title="Round trip")
+        self.assertEqual(imported.category.slug, "food")
+        self.assertEqual(list(imported.tags.values_list("slug", flat=True)), ["django"])
+        # JSON timestamps carry milliseconds
+        self.assertAlmostEqual(imported.created_at, post.created_at, delta=timedelta(milliseconds=1))
+
+    def test_bad_records_are_skipped_and_consumed(self):
+        lines = "\n".join([
+            '{"title": "One", "author": "author"}',
+            '{"title": broken',
+            '[1, 2]',
+            '{"title": "Two", "author": "author", "views": -1}',
+            '{"title": "Three", "author": "author", "views": "7"}',
+        ])
+        post_importer, consumed = self.run_import(lines)
+        self.assertEqual((post_importer.imported, post_importer.skipped, consumed), (2, 3, 5))
+        self.assertEqual(Post.objects.get(title="Three").views, 7)
+
+    def test_resume_skips_consumed_records(self):
+        lines = '{"title": "One", "author": "author"}\n{"title": "Two", "author": "author"}\n'
+        post_importer, consumed = self.run_import(lines, start=1)
+        self.assertEqual(consumed, 2)
+        self.assertEqual(list(Post.objects.values_list("title", flat=True)), ["Two"])
+
+    def test_skipped_records_create_no_taxonomy(self):
+        lines = "\n".join([
+            '{"title": "Bad views", "author": "author", "views": -1, "category": "Brand New", "tags": ["New Tag"]}',
+            '{"title": "No author", "author": "nobody", "category": "Other New", "tags": "Other Tag"}',
+        ])
+        post_importer, _consumed = self.run_import(lines)
+        self.assertEqual(post_importer.skipped, 2)
+        self.assertFalse(Category.objects.exists())
+        self.assertFalse(Tag.objects.exists())
+
+
+class NotificationStreamTests(BlogTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("reader")
+
+    def test_wsgi_requests_are_refused(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("notification_stream"))
+        self.assertEqual(response.status_code, 501)
+
+    async def test_asgi_requests_stream(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse("notification_stream"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+
+
+class RelatedPostTests(BlogTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user("author")
+        cls.category = Category.objects.create(name="Food", slug="food")
+
+    def related_ids(self, post):
+        return [item["id"] for item in self.client.get(reverse("post_detail", args=[post.pk])).json()["post"]["related"]]
+
+    def test_fallback_lists_live_posts_of_the_category(self):
+        post = make_post(self.author, category=self.category)
+        live = make_post(self.author, category=self.category, title="Live")
+        make_post(self.author, category=self.category, approved=False)
+        make_post(self.author, category=self.category, status="scheduled")
+        self.assertEqual(self.related_ids(post), [live.pk])
+
+    def test_uncategorized_post_has_no_fallback(self):
+        post = make_post(self.author)
+        make_post(self.author)
+        self.assertEqual(list(post.related_posts()), [])
+
+    def test_detail_shows_recomputed_neighbours(self):
+        post = make_post(self.author, title="Sourdough bread baking", category=self.category)
+        self.assertEqual(self.related_ids(post), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            other = make_post(self.author, title="Sourdough bread starter", category=self.category)
+            related.update_posts([post.pk, other.pk])
+        self.assertEqual(self.related_ids(post), [other.pk])
+
+
+class BulkApiTests(BlogTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user("author")
+
+    def delete(self, url, ids):
+        return self.client.delete(url, json.dumps({"ids": ids}), content_type="application/json",
+                                  HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.author)}")
+
+    def test_delete_rejects_boolean_ids(self):
+        post = make_post(self.author)
+        tag = Tag.objects.create(name="Django", slug="django")
+        for url, pk in (("/api/posts/bulk/", post.pk), ("/api/tags/bulk/", tag.pk)):
+            with self.subTest(url=url):
+                self.assertEqual(self.delete(url, [True]).status_code, 400)
+                self.assertEqual(self.delete(url, [pk, False]).status_code, 400)
+        self.assertTrue(Post.objects.filter(pk=post.pk).exists())
+        self.assertTrue(Tag.objects.filter(pk=tag.pk).exists())
+
+    def test_delete_reports_each_id(self):
+        post = make_post(self.author)
+        results = self.delete("/api/posts/bulk/", [post.pk, post.pk + 1000]).json()["results"]
+        self.assertEqual([result["status"] for result in results], [204, 404])
+        self.assertFalse(Post.objects.filter(pk=post.pk).exists())
+
+
+class MetricsTests(BlogTestCase):
+    def test_every_buffer_has_a_gauge(self):
+        self.client.force_login(User.objects.create_user("staff", is_staff=True))
+        body = self.client.get(reverse("metrics")).content.decode()
+        for name in ("feeds", "notifications", "related", "trending", "views"):
+            self.assertIn(f'blog_buffer_pending{{buffer="{name}"}}', body)
+
+
+class SchedulerTests(BlogTestCase):
+    def test_publishes_only_due_posts(self):
+        author = User.objects.create_user("author")
+        now = timezone.now()
+        due = make_post(author, status="scheduled", publish_date=now - timedelta(minutes=1))
+        later = make_post(author, status="scheduled", publish_date=now + timedelta(hours=1))
+        self.assertEqual(scheduler.publish_due(batch_size=1, now=now), 1)
+        self.assertEqual(list(Post.objects.live().values_list("id", flat=True)), [due.pk])
+        later.refresh_from_db()
+        self.assertEqual(later.status, "scheduled")
+
+
+def forge_cursor(payload):
+    raw = payload if isinstance(payload, str) else json.dumps(payload)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+class KeysetPaginationTests(BlogTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user("author")
+        created = timezone.now()
+        # Pairs share a timestamp, so pages have to break ties on id
+        cls.posts = [make_post(author, title=f"Post {i}") for i in range(7)]
+        for i, post in enumerate(cls.posts):
+            Post.objects.filter(pk=post.pk).update(created_at=created - timedelta(minutes=i // 2))
+        cls.expected = list(Post.objects.order_by("-created_at", "-pk").values_list("pk", flat=True))
+
+    def paginator(self):
+        return KeysetPaginator(Post.objects.all(), page_size=3)
+
+    def test_walks_forward_and_back(self):
+        paginator = self.paginator()
+        pages, page = [], paginator.page()
+        while True:
+            pages.append([post.pk for post in page])
+            if not page.has_next:
+                break
+            page = paginator.page(page.next_cursor)
+        self.assertEqual(sum(pages, []), self.expected)
+        self.assertEqual([len(ids) for ids in pages], [3, 3, 1])
+        self.assertIsNone(paginator.page().prev_cursor)
+
+        back = [[post.pk for post in page]]
+        while page.has_previous:
+            page = paginator.page(page.prev_cursor)
+            back.insert(0, [post.pk for post in page])
+        self.assertEqual(back, pages)
+
+    def test_forged_cursors_are_rejected(self):
+        paginator = self.paginator()
+        valid = paginator.page().next_cursor
+        forged = [
+            "not a cursor", "é", valid[:-4],
+            forge_cursor([1, 2]),
+            forge_cursor({"d": "x", "t": "2024-01-01T00:00:00+00:00", "k": 1}),
+            forge_cursor({"d": "n", "f": "title", "t": "2024-01-01T00:00:00+00:00", "k": 1}),
+            forge_cursor({"d": "n", "t": "yesterday", "k": 1}),
+            forge_cursor({"d": "n", "v": [1], "k": 1}),
+            forge_cursor({"d": "n", "t": "2024-01-01T00:00:00+00:00", "k": "one"}),
+            forge_cursor({"d": "n", "t": "2024-01-01T00:00:00+00:00", "k": 10 ** 30}),
+            forge_cursor('{"d": "n", "t": "2024-01-01T00:00:00+00:00", "k": 1e999}'),
+        ]
+        for cursor in forged:
+            with self.subTest(cursor=cursor):
+                with self.assertRaises(InvalidCursor):
+                    paginator.page(cursor)
+
+    def test_views_answer_forged_cursors_with_404(self):
+        cursor = forge_cursor({"d": "n", "t": "2024-01-01T00:00:00+00:00", "k": 10 ** 30})
+        for url in (reverse("home"), reverse("search_posts"), "/api/posts/",
+                    reverse("comment_threads", args=[self.posts[0].pk])):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url, {"q": "post", "cursor": cursor}).status_code, 404)
+
+
+class CommentThreadTests(BlogTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("reader")
+        cls.post = make_post(cls.user)
+
+    def reply(self, parent=None, text="Hi"):
+        return Comment.objects.create(post=self.post, user=self.user, text=text, parent=parent)
+
+    def test_replies_extend_the_parent_path(self):
+        root = self.reply()
+        child = self.reply(root)
+        grandchild = self.reply(child)
+        self.assertEqual(root.path, Comment.PATH_SEGMENT.format(root.pk))
+        self.assertEqual(grandchild.path, f"{child.path}/{Comment.PATH_SEGMENT.format(grandchild.pk)}")
+        self.assertEqual((grandchild.depth, grandchild.root_id), (2, root.pk))
+        grandchild.refresh_from_db()
+        self.assertTrue(grandchild.path.startswith(root.path + "/"))
+
+    def test_depth_is_capped(self):
+        comment = self.reply()
+        for _ in range(Comment.MAX_THREAD_DEPTH + 2):
+            comment = self.reply(comment)
+        self.assertEqual(comment.depth, Comment.MAX_THREAD_DEPTH)
+        self.assertEqual(comment.parent.depth, Comment.MAX_THREAD_DEPTH - 1)
+        self.assertLessEqual(len(comment.path), Comment._meta.get_field("path").max_length)
+
+    def test_threads_are_cut_at_max_depth_and_expand_lazily(self):
+        root = self.reply(text="root")
+        child = self.reply(root, text="child")
+        grandchild = self.reply(child, text="grandchild")
+        self.reply(text="second root")
+        page, _page = threads.load_threads(self.post.pk, max_depth=1)
+        self.assertEqual([thread["text"] for thread in page], ["root", "second root"])
+        (reply,) = page[0]["replies"]
+        self.assertEqual((reply["id"], reply["replies"], reply["has_more_replies"]), (child.pk, [], True))
+
+        response = self.client.get(reverse("comment_replies", args=[child.pk])).json()
+        self.assertEqual([branch["id"] for branch in response["replies"]], [grandchild.pk])
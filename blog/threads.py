@@ -0,0 +1,83 @@
+from django.conf import settings
+
+from .models import Comment
+from .pagination import KeysetPaginator
+
+FIELDS = ("id", "parent_id", "depth", "path", "user__username", "text", "created_at")
+
+
+def _node(row):
+    return {
+        "id": row["id"],
+        "user": row["user__username"],
+        "text": row["text"],
+        "created_at": row["created_at"],
+        "replies": [],
+        "has_more_replies": False,
+    }
+
+
+def build_tree(rows, nodes, max_depth):
+    """
+    Attaches comment rows ordered by path to ``nodes`` (id -> node) in one
+    pass; path order guarantees a parent is seen before its replies. Rows
+    deeper than ``max_depth`` are not returned, they only flag their parent
+    with ``has_more_replies`` so the branch can be loaded lazily.
+    """
+    for row in rows:
+        parent = nodes.get(row["parent_id"])
+        if row["depth"] > max_depth:
+            if parent is not None:
+                parent["has_more_replies"] = True
+            continue
+        node = nodes[row["id"]] = _node(row)
+        if parent is not None:
+            parent["replies"].append(node)
+    return nodes
+
+
+def thread_depth():
+    return getattr(settings, "BLOG_THREAD_DEPTH", 3)
+
+
+def load_threads(post_id, cursor=None, page_size=None, max_depth=None):
+    """
+    Returns (threads, page) for one page of a post's top-level comments.
+    Replies down to ``max_depth`` for every thread on the page are fetched
+    with a single query ordered by (root, path).
+    """
+    max_depth = thread_depth() if max_depth is None else max_depth
+    roots = Comment.objects.filter(post_id=post_id, depth=0).values(*FIELDS)
+    page = KeysetPaginator(roots, page_size=page_size, descending=False).page(cursor)
+    root_ids = [row["id"] for row in page.object_list]
+
+    rows = list(page.object_list)
+    if root_ids and max_depth > 0:
+        rows += list(
+            Comment.objects.filter(root_id__in=root_ids, depth__lte=max_depth + 1)
+            .order_by("root_id", "path")
+            .values(*FIELDS)
+        )
+    # Roots first, then each thread's replies; parents always precede children.
+    nodes = build_tree(rows, {}, max_depth)
+    return [nodes[pk] for pk in root_ids], page
+
+
+def load_branch(comment, max_depth=None):
+    """
+    Returns the replies below ``comment``, ``max_depth`` levels deep, for
+    lazily expanding a branch that load_threads cut off.
+    """
+    max_depth = thread_depth() if max_depth is None else max_depth
+    rows = (
+        Comment.objects.filter(
+            root_id=comment.root_id or comment.pk,
+            path__startswith=f"{comment.path}/",
+            depth__lte=comment.depth + max_depth + 1,
+        )
+        .order_by("path")
+        .values(*FIELDS)
+    )
+    branch = {"replies": [], "has_more_replies": False}
+    build_tree(rows, {comment.pk: branch}, comment.depth + max_depth)
+    return branch["replies"]
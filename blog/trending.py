@@ -0,0 +1,180 @@
+import heapq
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Max
+from django.utils import timezone
+
+from . import caching
+from .buffering import WriteBehindBuffer
+from .models import Comment, Like, Post, Rating, TrendingEntry
+
+TRENDING = "trending"
+GLOBAL_SCOPE = 0  # TrendingEntry.scope for the site-wide list; otherwise a category id
+
+# Scores below this are reset to 0 so decayed posts leave the scan set.
+MIN_SCORE = 0.01
+
+DEFAULT_WEIGHTS = {"view": 1.0, "like": 4.0, "rating": 3.0, "comment": 6.0}
+
+_buffer = None
+
+
+def weight(kind):
+    """Points per event of ``kind``; BLOG_TRENDING_WEIGHTS overrides some or all of DEFAULT_WEIGHTS."""
+    return {**DEFAULT_WEIGHTS, **getattr(settings, "BLOG_TRENDING_WEIGHTS", {})}[kind]
+
+
+def half_life():
+    """Hours for an engagement event to lose half its weight."""
+    return getattr(settings, "BLOG_TRENDING_HALF_LIFE", 24.0)
+
+
+def list_size():
+    return getattr(settings, "BLOG_TRENDING_SIZE", 50)
+
+
+# -------------------------
+# Incremental scoring
+# -------------------------
+def apply_scores(items):
+    """
+    Adds buffered (post_id, delta) pairs to Post.trend_score. Like view
+    counts, posts with the same pending delta share one UPDATE.
+    """
+    by_delta = defaultdict(list)
+    for post_id, delta in items:
+        by_delta[delta].append(post_id)
+    with transaction.atomic():
+        for delta, post_ids in by_delta.items():
+            Post.objects.filter(pk__in=post_ids).update(trend_score=F("trend_score") + delta)
+
+
+def get_buffer():
+    global _buffer
+    if _buffer is None:
+        _buffer = WriteBehindBuffer(
+            apply_scores,
+            interval=getattr(settings, "BLOG_TRENDING_FLUSH_INTERVAL", 5.0),
+        )
+    return _buffer
+
+
+def record(post_id, kind):
+    """
+    Credits one like/comment/rating to a post's trending score once the
+    surrounding transaction commits. Views are credited by
+    blog.viewcount in the same UPDATE that bumps Post.views.
+    """
+    delta = weight(kind)
+    transaction.on_commit(lambda: get_buffer().add(post_id, delta))
+
+
+def rebuild_scores(now=None, batch_size=1000, stdout=None):
+    """
+    Recomputes every score from the timestamped engagement tables, each
+    event decayed from its created_at to ``now``. Views carry no
+    timestamps and only count from here on. Returns the number of posts
+    scored.
+    """
+    now = now or timezone.now()
+    rate = 1 / (half_life() * 3600)
+    scores = defaultdict(float)
+    for model, kind in ((Like, "like"), (Comment, "comment"), (Rating, "rating")):
+        w = weight(kind)
+        for post_id, created_at in model.objects.values_list("post_id", "created_at").iterator(chunk_size=5000):
+            scores[post_id] += w * 0.5 ** (max(0.0, (now - created_at).total_seconds()) * rate)
+    scored = [(pk, score) for pk, score in scores.items() if score >= MIN_SCORE]
+    with transaction.atomic():
+        Post.objects.filter(trend_score__gt=0).update(trend_score=0)
+        for start in range(0, len(scored), batch_size):
+            batch = [Post(pk=pk, trend_score=score) for pk, score in scored[start:start + batch_size]]
+            Post.objects.bulk_update(batch, ["trend_score"])
+            if stdout is not None:
+                stdout.write(f"Scored {start + len(batch)} posts")
+    return len(scored)
+
+
+# -------------------------
+# Snapshots
+# -------------------------
+def decay(now, since):
+    """
+    Ages every live score by the time elapsed since the previous snapshot:
+    score *= 0.5 ** (hours / half_life). New events are always added at
+    full weight, so between snapshots older events are worth
+    proportionally less.
+    """
+    hours = (now - since).total_seconds() / 3600
+    if hours <= 0:
+        return
+    factor = 0.5 ** (hours / half_life())
+    scored = Post.objects.filter(trend_score__gt=0)
+    scored.update(trend_score=F("trend_score") * factor)
+    scored.filter(trend_score__lt=MIN_SCORE).update(trend_score=0)
+
+
+def top_posts(size):
+    """
+    One pass over the scored live posts, keeping a bounded min-heap of
+    (score, id) per category and globally. Returns {scope: [(score, id)]},
+    best first.
+    """
+    heaps = defaultdict(list)
+    rows = (
+        Post.objects.live().filter(trend_score__gt=0)
+        .values_list("id", "category_id", "trend_score")
+        .iterator(chunk_size=5000)
+    )
+    for pk, category_id, score in rows:
+        scopes = (GLOBAL_SCOPE,) if category_id is None else (GLOBAL_SCOPE, category_id)
+        for scope in scopes:
+            heap = heaps[scope]
+            if len(heap) < size:
+                heapq.heappush(heap, (score, pk))
+            elif (score, pk) > heap[0]:
+                heapq.heapreplace(heap, (score, pk))
+    return {scope: sorted(heap, reverse=True) for scope, heap in heaps.items()}
+
+
+def snapshot(now=None, size=None, stdout=None, decay_scores=True):
+    """
+    Flushes pending events, decays scores to ``now`` and replaces the
+    ranked TrendingEntry lists. Pass ``decay_scores=False`` right after
+    rebuild_scores(), whose scores are already decayed to ``now``.
+    Returns the number of entries written.
+    """
+    now = now or timezone.now()
+    size = size or list_size()
+    get_buffer().flush()
+    previous = TrendingEntry.objects.aggregate(taken=Max("computed_at"))["taken"]
+    with transaction.atomic():
+        if previous is not None and decay_scores:
+            decay(now, previous)
+        ranked = top_posts(size)
+        entries = [
+            TrendingEntry(scope=scope, rank=rank, post_id=pk, score=score, computed_at=now)
+            for scope, top in ranked.items()
+            for rank, (score, pk) in enumerate(top)
+        ]
+        TrendingEntry.objects.all().delete()
+        TrendingEntry.objects.bulk_create(entries, batch_size=1000)
+    caching.bump(TRENDING)
+    if stdout is not None:
+        categories = sum(1 for scope in ranked if scope != GLOBAL_SCOPE)
+        stdout.write(f"Ranked {len(ranked.get(GLOBAL_SCOPE, []))} posts globally and in {categories} categories")
+    return len(entries)
+
+
+def trending_posts(category_id=None):
+    """
+    Posts of the latest snapshot for a category (or globally), best first,
+    in one query plus tags. Posts unpublished or rescheduled since the
+    snapshot are left out.
+    """
+    return (
+        Post.objects.feed().live()
+        .filter(trending_entries__scope=category_id or GLOBAL_SCOPE)
+        .order_by("trending_entries__rank")
+    )
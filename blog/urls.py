@@ -1,16 +1,20 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
 from rest_framework.authtoken.views import obtain_auth_token
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
 )
 
+# Read-heavy views have async twins for ASGI deployments
+reads = async_views if getattr(settings, "BLOG_ASYNC_VIEWS", False) else views
+
 urlpatterns = [
     # -------------------------
     # Home & Authentication (HTML Views)
     # -------------------------
-    path("", views.home, name="home"),
+    path("", reads.home, name="home"),
     path("register/", views.register, name="register"),
     path("login/", views.user_login, name="login"),
     path("logout/", views.user_logout, name="logout"),
@@ -19,17 +23,25 @@ urlpatterns = [
     # Posts (HTML Views)
     # -------------------------
     path("post/create/", views.create_post, name="create_post"),
-    path("post/<int:pk>/", views.post_detail, name="post_detail"),
+    path("post/<int:pk>/", reads.post_detail, name="post_detail"),
     path("post/<int:pk>/edit/", views.update_post, name="update_post"),
     path("post/<int:pk>/delete/", views.delete_post, name="delete_post"),
     path("post/<int:pk>/like/", views.toggle_like, name="toggle_like"),
     path("post/<int:pk>/bookmark/", views.toggle_bookmark, name="toggle_bookmark"),
+    path("post/<int:pk>/rate/", views.rate_post, name="rate_post"),
 
     # -------------------------
     # Categories & Tags
     # -------------------------
-    path("category/<int:category_id>/", views.posts_by_category, name="posts_by_category"),
-    path("tag/<int:tag_id>/", views.posts_by_tag, name="posts_by_tag"),
+    path("category/<int:category_id>/", reads.posts_by_category, name="posts_by_category"),
+    path("tag/<int:tag_id>/", reads.posts_by_tag, name="posts_by_tag"),
+    path("trending/", views.trending_posts, name="trending"),
+
+    # -------------------------
+    # Following
+    # -------------------------
+    path("following/", views.following_feed, name="following_feed"),
+    path("follow/<slug:target>/<int:pk>/", views.toggle_follow, name="toggle_follow"),
 
     # -------------------------
     # Profiles
@@ -39,18 +51,28 @@ urlpatterns = [
     # -------------------------
     # Comments
     # -------------------------
+    path("post/<int:pk>/comments/", views.comment_threads, name="comment_threads"),
+    path("comment/<int:comment_id>/replies/", views.comment_replies, name="comment_replies"),
     path("comment/<int:comment_id>/delete/", views.delete_comment, name="delete_comment"),
 
     # -------------------------
     # Search
     # -------------------------
-    path("search/", views.search_posts, name="search_posts"),
+    path("search/", reads.search_posts, name="search_posts"),
 
     # -------------------------
     # Notifications
     # -------------------------
-    path("notifications/", views.my_notifications, name="my_notifications"),
+    path("notifications/", reads.my_notifications, name="my_notifications"),
+    path("notifications/stream/", async_views.notification_stream, name="notification_stream"),
     path("notifications/<int:pk>/read/", views.mark_notification_read, name="mark_notification_read"),
+    path("notifications/mark-read/", views.mark_notifications_read, name="mark_notifications_read"),
+
+    # -------------------------
+    # Monitoring (staff only)
+    # -------------------------
+    path("metrics/", views.metrics, name="metrics"),
+    path("export/<slug:kind>.<slug:fmt>", views.export_data, name="export_data"),
 
     # -------------------------
     # User Preferences
@@ -0,0 +1,55 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from . import trending
+from .buffering import WriteBehindBuffer
+from .models import Post
+
+_buffer = None
+
+
+def apply_view_counts(items):
+    """
+    Adds buffered hits to Post.views, and credits them to the trending
+    score in the same statement. Posts with the same pending count share
+    one ``UPDATE ... SET views = views + n WHERE id IN (...)``, so a batch
+    costs a handful of statements rather than one per post.
+    """
+    by_count = defaultdict(list)
+    for post_id, hits in items:
+        by_count[hits].append(post_id)
+    view_weight = trending.weight("view")
+    with transaction.atomic():
+        for hits, post_ids in by_count.items():
+            Post.objects.filter(pk__in=post_ids).update(
+                views=F("views") + hits, trend_score=F("trend_score") + hits * view_weight
+            )
+
+
+def get_buffer():
+    global _buffer
+    if _buffer is None:
+        _buffer = WriteBehindBuffer(
+            apply_view_counts,
+            interval=getattr(settings, "BLOG_VIEW_FLUSH_INTERVAL", 5.0),
+            max_pending=getattr(settings, "BLOG_VIEW_MAX_PENDING", 1000),
+            batch_size=getattr(settings, "BLOG_VIEW_FLUSH_BATCH_SIZE", 500),
+        )
+    return _buffer
+
+
+def record_view(post_id):
+    """
+    Counts one hit on a post. Hits are buffered per process and written
+    behind as additive UPDATEs, so several workers can count the same post
+    without losing increments; at most one flush interval of hits is lost
+    if a worker dies.
+    """
+    get_buffer().add(post_id)
+
+
+def flush():
+    return get_buffer().flush()
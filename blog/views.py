@@ -1,14 +1,22 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login, logout
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import AuthenticationForm
 from django.contrib.auth.models import User
-from django.db.models import Q
 from django.contrib import messages
+from django.db import transaction
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 from .forms import UserRegisterForm, PostForm, CommentForm
 from .models import Post, Category, Tag, Comment, Bookmark, Like, Notification, Profile
-from django.http import JsonResponse
+from .context_processors import THEME_SESSION_KEY
+from .pagination import InvalidCursor, get_page_size, paginate_request
+from . import caching, conditional, export, feeds, instrumentation, notifications, ratings, search, threads, trending, viewcount
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 import json
 
 # ---- DRF imports for JWT ----
@@ -25,6 +33,7 @@ def toggle_theme(request):
     profile, created = Profile.objects.get_or_create(user=request.user)
     profile.theme_preference = "dark" if profile.theme_preference == "light" else "light"
     profile.save()
+    request.session[THEME_SESSION_KEY] = profile.theme_preference
     return redirect(request.META.get('HTTP_REFERER', '/'))
 
 
@@ -33,16 +42,42 @@ def toggle_theme(request):
 # -------------------------
 @login_required
 def my_notifications(request):
-    notifications = Notification.objects.filter(user=request.user).order_by("-created_at")
-    return render(request, "blog/notifications.html", {"notifications": notifications})
+    inbox = Notification.objects.filter(user=request.user)
+    unread_only = request.GET.get("unread") == "1"
+    if unread_only:
+        inbox = inbox.filter(is_read=False)
+    page = paginate_request(request, inbox)
+    return render(request, "blog/notifications.html", {
+        "notifications": page.object_list,
+        "page": page,
+        "unread_only": unread_only,
+    })
 
 
 @login_required
 def mark_notification_read(request, pk):
-    notification = get_object_or_404(Notification, pk=pk, user=request.user)
-    notification.is_read = True
-    notification.save()
-    return redirect(notification.url or "my_notifications")
+    url = get_object_or_404(
+        Notification.objects.values_list("url", flat=True), pk=pk, user=request.user
+    )
+    notifications.mark_read(request.user, ids=[pk])
+    return redirect(url or "my_notifications")
+
+
+@login_required
+@require_POST
+def mark_notifications_read(request):
+    """
+    Bulk mark-as-read: marks the posted ``ids`` (or everything, when
+    ``all`` is set) in a single UPDATE.
+    """
+    if request.POST.get("all"):
+        updated = notifications.mark_read(request.user)
+    else:
+        ids = [int(pk) for pk in request.POST.getlist("ids") if pk.isdigit()]
+        updated = notifications.mark_read(request.user, ids=ids) if ids else 0
+    if request.headers.get("Accept") == "application/json":
+        return JsonResponse({"updated": updated})
+    return redirect(request.META.get("HTTP_REFERER") or "my_notifications")
 
 
 # -------------------------
@@ -57,9 +92,11 @@ def my_bookmarks(request):
 @login_required
 def toggle_bookmark(request, pk):
     post = get_object_or_404(Post, pk=pk)
-    bookmark, created = Bookmark.objects.get_or_create(post=post, user=request.user)
+    with transaction.atomic():
+        bookmark, created = Bookmark.objects.get_or_create(post=post, user=request.user)
+        if not created:
+            bookmark.delete()
     if not created:
-        bookmark.delete()
         messages.info(request, "Removed from bookmarks.")
     else:
         messages.success(request, "Post saved to bookmarks.")
@@ -72,42 +109,142 @@ def toggle_bookmark(request, pk):
 @login_required
 def toggle_like(request, pk):
     post = get_object_or_404(Post, pk=pk)
-    like, created = Like.objects.get_or_create(post=post, user=request.user)
+    with transaction.atomic():
+        like, created = Like.objects.get_or_create(post=post, user=request.user)
+        if not created:
+            like.delete()
     if not created:
-        like.delete()
         messages.info(request, "You unliked this post.")
     else:
         messages.success(request, "You liked this post.")
     return redirect('post_detail', pk=pk)
 
 
+# -------------------------
+# Ratings
+# -------------------------
+@login_required
+@require_POST
+def rate_post(request, pk):
+    post = get_object_or_404(Post.objects.live().only("id"), pk=pk)
+    value = request.POST.get("value", "")
+    if not value.isdigit() or int(value) not in ratings.VALUES:
+        messages.error(request, "Choose a rating from 1 to 5 stars.")
+        return redirect('post_detail', pk=pk)
+    _rating, created = ratings.rate(request.user, post.pk, int(value))
+    messages.success(request, "Thanks for rating this post." if created else "Your rating was updated.")
+    return redirect('post_detail', pk=pk)
+
+
 # -------------------------
 # Home and filters
 # -------------------------
+def follow_context(request, target, pk):
+    """Template context for the follow/unfollow button of an author, tag or category."""
+    if not request.user.is_authenticated:
+        return None
+    return {"target": target, "id": pk, "following": feeds.is_following(request.user, target, pk)}
+
+
+def render_feed(request, view_name, posts, filter=None, follow=None):
+    """
+    Renders a paginated post listing. The list fragment depends only on the
+    query string and DB state, so it is cached under the feed namespace and
+    invalidated from blog.signals whenever posts, comments or tags change.
+    ``follow`` is an optional (target, id) the page offers to follow.
+    """
+    def build():
+        page = paginate_request(request, posts)
+        return render_to_string("blog/post_list.html", {"posts": page.object_list, "page": page}, request=request)
+
+    posts_html = caching.get_or_set(caching.FEED, (view_name, request.get_full_path()), build)
+    return render(request, "blog/home.html", {
+        "posts_html": posts_html,
+        "filter": filter,
+        "follow": follow_context(request, *follow) if follow else None,
+    })
+
+
 def home(request):
-    posts = Post.objects.filter(approved=True).order_by('-created_at')
-    return render(request, "blog/home.html", {"posts": posts})
+    posts = Post.objects.feed().live()
+    return render_feed(request, "home", posts)
 
 
 def posts_by_category(request, category_id):
     category = get_object_or_404(Category, id=category_id)
-    posts = Post.objects.filter(category=category, approved=True)
-    return render(request, "blog/home.html", {"posts": posts, "filter": f"Category: {category.name}"})
+    posts = Post.objects.feed().live().filter(category=category)
+    return render_feed(request, "posts_by_category", posts, filter=f"Category: {category.name}",
+                       follow=("category", category.id))
 
 
 def posts_by_tag(request, tag_id):
     tag = get_object_or_404(Tag, id=tag_id)
-    posts = Post.objects.filter(tags=tag, approved=True)
-    return render(request, "blog/home.html", {"posts": posts, "filter": f"Tag: {tag.name}"})
+    posts = Post.objects.feed().live().filter(tags=tag)
+    return render_feed(request, "posts_by_tag", posts, filter=f"Tag: {tag.name}", follow=("tag", tag.id))
+
+
+@login_required
+def following_feed(request):
+    """Posts from the authors, tags and categories the user follows; see blog/feeds.py."""
+    try:
+        page = feeds.feed_page(request.user, request.GET.get("cursor"), get_page_size(request))
+    except InvalidCursor:
+        raise Http404("Invalid cursor")
+    return render(request, "blog/home.html", {"posts": page.object_list, "page": page, "filter": "Following"})
+
+
+FOLLOW_TARGETS = {"author": User, "tag": Tag, "category": Category}
+
+
+@login_required
+@require_POST
+def toggle_follow(request, target, pk):
+    if target not in FOLLOW_TARGETS:
+        raise Http404("Unknown follow target")
+    obj = get_object_or_404(FOLLOW_TARGETS[target], pk=pk)
+    back = request.META.get("HTTP_REFERER") or "following_feed"
+    if obj == request.user:
+        messages.error(request, "You can't follow yourself.")
+        return redirect(back)
+    if feeds.toggle(request.user, target, obj.pk):
+        messages.success(request, f"You now follow {obj}.")
+    else:
+        messages.info(request, f"You unfollowed {obj}.")
+    return redirect(back)
+
+
+def trending_posts(request):
+    """
+    The latest trending snapshot, site-wide or for ?category=<id>. Lists
+    are precomputed by snapshot_trending; the fragment is cached until the
+    next snapshot or feed change.
+    """
+    category = None
+    category_id = request.GET.get("category", "")
+    if category_id:
+        if not category_id.isdigit():
+            raise Http404("Unknown category")
+        category = get_object_or_404(Category, id=category_id)
+
+    def build():
+        posts = trending.trending_posts(category.id if category else None)
+        return render_to_string("blog/post_list.html", {"posts": posts}, request=request)
+
+    parts = ("list", category.id if category else None, caching.get_version(caching.FEED))
+    posts_html = caching.get_or_set(trending.TRENDING, parts, build)
+    title = f"Trending in {category.name}" if category else "Trending"
+    return render(request, "blog/home.html", {"posts_html": posts_html, "filter": title})
 
 
 def search_posts(request):
     query = request.GET.get("q", "").strip()
-    posts = Post.objects.filter(
-        Q(title__icontains=query) | Q(content__icontains=query),
-        approved=True
-    ) if query else []
-    return render(request, "blog/home.html", {"posts": posts, "filter": f"Search: {query}" if query else None})
+    if not query:
+        return render(request, "blog/home.html", {"posts": [], "filter": None})
+    try:
+        page = search.search_posts(query, cursor=request.GET.get("cursor"), page_size=get_page_size(request))
+    except InvalidCursor:
+        raise Http404("Invalid cursor")
+    return render(request, "blog/home.html", {"posts": page.object_list, "page": page, "filter": f"Search: {query}"})
 
 
 # -------------------------
@@ -170,12 +307,18 @@ def profile(request, username):
     user_profile = get_object_or_404(User, username=username)
     profile_info = getattr(user_profile, 'profile', None)
 
-    posts = Post.objects.filter(author=user_profile, approved=True)
-    liked_posts = Post.objects.filter(likes__user=user_profile, approved=True).distinct()
-    bookmarked_posts = Post.objects.filter(bookmarked_by__user=user_profile, approved=True).distinct()
+    posts = Post.objects.live().filter(author=user_profile)
+    # Semi-joins: (post, user) is unique on both tables, so no DISTINCT is needed
+    liked_posts = Post.objects.live().filter(
+        id__in=Like.objects.filter(user=user_profile).values("post_id")
+    )
+    bookmarked_posts = Post.objects.live().filter(
+        id__in=Bookmark.objects.filter(user=user_profile).values("post_id")
+    )
 
     return render(request, 'blog/profile.html', {
         'user_profile': user_profile,
+        'follow': follow_context(request, "author", user_profile.pk) if request.user != user_profile else None,
         'profile_info': profile_info,
         'posts': posts,
         'liked_posts': liked_posts,
@@ -186,21 +329,65 @@ def profile(request, username):
 # -------------------------
 # Post detail & comments
 # -------------------------
+def detail_post(pk):
+    """The "post" part of the post_detail payload; raises Http404 unless the post is live."""
+    post = get_object_or_404(Post.objects.live(), pk=pk)
+    return {
+        "id": post.id,
+        "title": post.title,
+        "content": post.content,
+        "rating": ratings.summary(post),
+        "related": [{"id": related.id, "title": related.title} for related in post.related_posts()],
+    }
+
+
+def detail_comments(pk):
+    return list(Comment.objects.filter(post_id=pk).values("id", "user__username", "text", "created_at"))
+
+
 def post_detail(request, pk):
-    post = get_object_or_404(Post, pk=pk, approved=True)
-    comments = post.comments.all().values("id", "user__username", "text", "created_at")
+    if request.method != "GET":
+        return JsonResponse({"error": "Invalid request method"}, status=400)
+
+    def build():
+        post = detail_post(pk)
+        return {"post": post, "comments": detail_comments(pk)}
+
+    etag = conditional.post_detail_etag(pk)
+    response = conditional.not_modified(request, etag)
+    if response is None:
+        payload = caching.get_or_set(caching.post_namespace(pk), ("detail",), build)
+        response = conditional.set_validators(JsonResponse(payload, safe=False), etag)
+    # Revalidations are still reads of the post
+    viewcount.record_view(pk)
+    return response
+
+
+def comment_threads(request, pk):
+    """
+    One page of a post's top-level comments with their replies nested down
+    to BLOG_THREAD_DEPTH; deeper branches are fetched from comment_replies.
+    """
+    def build():
+        get_object_or_404(Post.objects.live().only("id"), pk=pk)
+        try:
+            threads_page, page = threads.load_threads(
+                pk, cursor=request.GET.get("cursor"), page_size=get_page_size(request)
+            )
+        except InvalidCursor:
+            raise Http404("Invalid cursor")
+        return {"threads": threads_page, "next": page.next_cursor, "previous": page.prev_cursor}
+
+    payload = caching.get_or_set(caching.post_namespace(pk), ("threads", request.get_full_path()), build)
+    return JsonResponse(payload)
 
-    if request.method == "GET":
-        return JsonResponse({
-            "post": {
-                "id": post.id,
-                "title": post.title,
-                "content": post.content,
-            },
-            "comments": list(comments),
-        }, safe=False)
 
-    return JsonResponse({"error": "Invalid request method"}, status=400)
+def comment_replies(request, comment_id):
+    comment = get_object_or_404(
+        Comment.objects.filter(post__in=Post.objects.live()).only("id", "post_id", "root_id", "depth", "path"),
+        id=comment_id,
+    )
+    return JsonResponse({"id": comment.pk, "replies": threads.load_branch(comment)})
 
 
 @login_required
@@ -271,6 +458,41 @@ def delete_post(request, pk):
     return render(request, "blog/post_confirm_delete.html", {"post": post})
 
 
+# -------------------------
+# Metrics
+# -------------------------
+@staff_member_required
+def metrics(request):
+    return HttpResponse(instrumentation.render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+# -------------------------
+# Data export (staff only)
+# -------------------------
+@staff_member_required
+def export_data(request, kind, fmt):
+    """
+    Streams a table as NDJSON or CSV in constant memory. ?since=<datetime>
+    limits it to rows changed after that moment, without the counter
+    columns (see blog/export.py); the X-Export-Until header is the value to
+    pass as ?since= on the next incremental run.
+    """
+    if kind not in export.EXPORTS or fmt not in export.FORMATS:
+        raise Http404("Unknown export")
+    since = None
+    if request.GET.get("since"):
+        since = parse_datetime(request.GET["since"])
+        if since is None:
+            return JsonResponse({"error": "since must be an ISO 8601 datetime"}, status=400)
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+    until = timezone.now()
+    response = StreamingHttpResponse(export.stream(kind, fmt, since, until), content_type=export.content_type(fmt))
+    response["Content-Disposition"] = f'attachment; filename="{kind}.{fmt}"'
+    response["X-Export-Until"] = until.isoformat()
+    return response
+
+
 # -------------------------
 # JWT Protected Test Endpoint
 # -------------------------
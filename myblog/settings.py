@@ -31,6 +31,7 @@ INSTALLED_APPS = [
 # MIDDLEWARE
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "blog.instrumentation.InstrumentationMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -54,6 +55,8 @@ TEMPLATES = [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
+                "blog.context_processors.theme",
+                "blog.context_processors.notifications",
             ],
         },
     },
@@ -70,6 +73,16 @@ DATABASES = {
     }
 }
 
+# CACHES
+# Local memory is per process; switch to FileBasedCache (or a shared
+# backend) when running several workers so invalidations reach all of them.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "myblog",
+    }
+}
+
 # PASSWORD VALIDATORS
 AUTH_PASSWORD_VALIDATORS = []
 
@@ -97,6 +110,41 @@ LOGIN_URL = "login"
 LOGIN_REDIRECT_URL = "home"
 LOGOUT_REDIRECT_URL = "home"
 
+# BLOG SETTINGS
+BLOG_PAGE_SIZE = 20        # posts per page on feeds and /api/posts/
+BLOG_MAX_PAGE_SIZE = 100   # upper bound for ?page_size=
+BLOG_SEARCH_BACKEND = None  # dotted path to a blog.search backend; None = FTS5 on SQLite
+BLOG_VIEW_FLUSH_INTERVAL = 5.0    # seconds post views are buffered before the bulk UPDATE (0 = write-through)
+BLOG_VIEW_FLUSH_BATCH_SIZE = 500  # posts per flush batch
+BLOG_VIEW_MAX_PENDING = 1000      # flush early once this many posts have pending hits
+BLOG_CACHE_ALIAS = "default"  # cache used for feed fragments and post payloads
+BLOG_CACHE_TIMEOUT = 300      # seconds; also bounds staleness of like counts on cached feeds
+BLOG_NOTIFICATION_FLUSH_INTERVAL = 2.0  # seconds like/comment events are coalesced before delivery
+BLOG_NOTIFICATION_BATCH_SIZE = 500      # notifications per bulk_create
+BLOG_NOTIFICATION_MAX_PENDING = 500     # deliver early once this many post/kind groups are queued
+BLOG_NOTIFICATION_RETENTION_DAYS = 90   # prune_notifications removes read notifications older than this
+# Notification streams only run under ASGI (myblog.asgi:application); WSGI servers answer 501.
+# LocalBroker reaches streams in its own process only; run several processes with a shared broker.
+BLOG_REALTIME_BROKER = None  # dotted path to a blog.realtime broker; None = in-process LocalBroker
+BLOG_SSE_HEARTBEAT = 15.0    # idle seconds between keep-alive comments on notification streams
+BLOG_SSE_QUEUE_SIZE = 100    # events buffered per stream before it falls back to a database catch-up
+BLOG_THREAD_DEPTH = 3  # reply levels loaded eagerly with each page of comment threads
+BLOG_RELATED_POSTS = 5             # neighbours precomputed per post
+BLOG_RELATED_FLUSH_INTERVAL = 10.0  # seconds edited posts wait before their neighbours are recomputed
+BLOG_TRENDING_HALF_LIFE = 24.0       # hours for a like/comment/rating/view to lose half its trending weight
+BLOG_TRENDING_SIZE = 50              # posts kept per trending list (site-wide and per category)
+BLOG_TRENDING_FLUSH_INTERVAL = 5.0   # seconds engagement events are buffered before scores are updated
+BLOG_FEED_FANOUT_LIMIT = 1000    # followers above which an author/tag/category is merged into feeds at read time
+BLOG_FEED_BACKFILL = 200         # newest posts copied into a feed on follow, unfollow or rebuild_feeds
+BLOG_FEED_FLUSH_INTERVAL = 2.0   # seconds new posts are buffered before fan-out to followers' feeds
+BLOG_RATING_PRIOR_MEAN = 3.0   # stars a post is assumed to have before it is rated (Bayesian score)
+BLOG_RATING_PRIOR_WEIGHT = 5   # how many virtual ratings the prior counts as
+BLOG_API_POST_CACHE = True  # cache serialized posts for /api/posts/ list and detail responses
+BLOG_API_BULK_MAX_ITEMS = 1000  # items per /api/<resource>/bulk/ request
+BLOG_ASYNC_VIEWS = False  # route home, feeds, post detail, search and notifications to blog.async_views (use under ASGI)
+BLOG_INSTRUMENTATION_SAMPLE_RATE = 0.1  # share of requests profiled for SQL/template time and Server-Timing
+BLOG_NPLUSONE_THRESHOLD = 5             # identical query fingerprints per request before an N+1 is logged
+
 # REST FRAMEWORK SETTINGS
 """REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (